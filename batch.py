@@ -0,0 +1,160 @@
+import argparse
+import contextlib
+import copy
+import csv
+import functools
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from alive_progress import config_handler
+
+from maze import PLANNERS
+from maze_binary import CACHE_DIR
+from maze_runner import load_maze
+
+FIELDS = ("job", "maze", "starting", "goal", "steps", "path_length", "score", "seconds", "error")
+# The number of parsed mazes each worker keeps, so consecutive jobs on the same maze only parse it once
+MAZES_PER_WORKER = 8
+
+
+def parse_coordinates(value) -> list[int] | None:
+    """ Reads "x, y" strings as well as [x, y] lists. Empty values are None, so the job's default is used """
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    coordinates = [int(x) for x in value]
+    if len(coordinates) != 2:
+        raise ValueError(f"Expected two coordinates, got {len(coordinates)}.")
+    return coordinates
+
+
+def read_manifest(manifest_file: str) -> list[dict[str, any]]:
+    """ Reads the jobs of a CSV manifest with the columns maze, starting and goal, or of a JSONL manifest with one
+    object with these keys per line. Relative maze paths are taken from the manifest's folder """
+    folder = os.path.dirname(manifest_file)
+    with open(manifest_file, newline="") as file:
+        if manifest_file.endswith(".jsonl"):
+            entries = [json.loads(line) for line in file if line.strip()]
+        else:
+            entries = list(csv.DictReader(file, skipinitialspace=True))
+
+    jobs = []
+    for number, entry in enumerate(entries):
+        jobs.append({"job": number, "maze": os.path.join(folder, entry["maze"]),
+                     "starting": entry.get("starting"), "goal": entry.get("goal")})
+    return jobs
+
+
+@functools.lru_cache(maxsize=MAZES_PER_WORKER)
+def _cached_maze(maze_file: str, cache_dir: str | None):
+    return load_maze(maze_file, cache_dir)
+
+
+def _describe(error: Exception) -> str:
+    return f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+
+
+def solve(job: dict[str, any], planner: str = "floodfill", cache_dir: str | None = CACHE_DIR) -> dict[str, any]:
+    """ Runs one job and returns its result row. Any error only ends up in the row's error field, so a bad maze file
+    or coordinates do not stop the other jobs """
+    row = dict.fromkeys(FIELDS, "")
+    row.update(job=job["job"], maze=job["maze"])
+    try:
+        maze = copy.deepcopy(_cached_maze(job["maze"], cache_dir))
+        starting = parse_coordinates(job["starting"]) or [0, 0]
+        goal = parse_coordinates(job["goal"]) or [maze.width - 1, maze.height - 1]
+        row.update(starting=starting, goal=goal)
+        for x, y in (starting, goal):
+            if not (0 <= x < maze.width and 0 <= y < maze.height):
+                raise ValueError(f"({x}, {y}) lies outside of the {maze.width}x{maze.height} maze.")
+        maze.planner = planner
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, _, steps, path_length, score = maze.shortest_path(starting=starting, goal=goal)
+        row.update(steps=steps, path_length=path_length, score=score, seconds=time.perf_counter() - start)
+    except Exception as error:
+        row["error"] = _describe(error)
+    return row
+
+
+def _init_worker():
+    config_handler.set_global(disable=True)
+
+
+class RowWriter:
+    """ Writes the result rows to a CSV or, for .jsonl files, a JSONL file as soon as they arrive """
+
+    def __init__(self, output_file: str):
+        self._file = open(output_file, "w", newline="")
+        self._jsonl = output_file.endswith(".jsonl")
+        if not self._jsonl:
+            self._writer = csv.DictWriter(self._file, fieldnames=FIELDS)
+            self._writer.writeheader()
+
+    def write(self, row: dict[str, any]):
+        if self._jsonl:
+            self._file.write(json.dumps(row) + "\n")
+        else:
+            self._writer.writerow({key: ", ".join(map(str, value)) if isinstance(value, list) else value
+                                  for key, value in row.items()})
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def run_batch(jobs: list[dict[str, any]], output_file: str, workers: int = 1, planner: str = "floodfill",
+              cache_dir: str | None = CACHE_DIR) -> int:
+    """ Solves all jobs, on a process pool with more than one worker, and returns how many of them failed """
+    writer = RowWriter(output_file)
+    failed = 0
+    try:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+                futures = {executor.submit(solve, job, planner, cache_dir): job for job in jobs}
+                for future in as_completed(futures):
+                    try:
+                        row = future.result()
+                    except Exception as error:
+                        # The worker itself died, the job's row is still written
+                        job = futures[future]
+                        row = dict.fromkeys(FIELDS, "")
+                        row.update(job=job["job"], maze=job["maze"], error=_describe(error))
+                    failed += bool(row["error"])
+                    writer.write(row)
+        else:
+            _init_worker()
+            for job in jobs:
+                row = solve(job, planner, cache_dir)
+                failed += bool(row["error"])
+                writer.write(row)
+    finally:
+        writer.close()
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ECS Maze Runner Batch Solver")
+
+    parser.add_argument("manifest", help='A CSV file with the columns maze, starting and goal (e.g., '
+                                         'large_maze2.mz,"0, 0","9, 9") or a .jsonl file with one such object per '
+                                         'line. Empty coordinates use the defaults of maze_runner.py.')
+    parser.add_argument("--output", help='The CSV or .jsonl file the result rows are written to.',
+                        default="results.csv")
+    parser.add_argument("--workers", help='The amount of processes the jobs are spread across.', type=int,
+                        default=os.cpu_count())
+    parser.add_argument("--planner", help="How the flood values are updated after each step.",
+                        choices=PLANNERS, default="floodfill")
+    parser.add_argument("--cache", help=f"Loads text mazes from a binary copy in '{CACHE_DIR}' after the first run.",
+                        action=argparse.BooleanOptionalAction, default=True)
+
+    args = parser.parse_args()
+
+    jobs = read_manifest(args.manifest)
+    failed = run_batch(jobs, args.output, args.workers, args.planner, CACHE_DIR if args.cache else None)
+    print(f"{len(jobs) - failed} of {len(jobs)} jobs solved, results saved as {args.output}")
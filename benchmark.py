@@ -0,0 +1,186 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import matplotlib
+import numpy as np
+
+from maze import PLANNERS, Maze
+from maze_gen import ALGORITHMS, generate_walls, write_maze_file
+from maze_runner import maze_reader
+from raster import RESOLUTION
+from runner import create_runner
+
+PHASES = ("maze_reader", "init", "explore", "flood_fill", "dijkstra", "render", "raster_render")
+STYLES = ("perfect", "loopy")
+# The share of the remaining inner walls a loopy maze loses after being carved as a perfect maze
+LOOP_FRACTION = 0.05
+CORPUS_DIR = ".bench_corpus"
+# Differences below this many seconds are timer noise and never count as a regression or an improvement
+MIN_DIFFERENCE = 0.001
+
+
+def build_corpus(sizes: list[int], styles: list[str], seed: int, corpus_dir: str = CORPUS_DIR,
+                 algorithm: str = "backtracker") -> list[tuple[str, str]]:
+    """ Generates every (style, size) maze of the seed once and returns their names and files """
+    os.makedirs(corpus_dir, exist_ok=True)
+    corpus = []
+    for size in sizes:
+        for style in styles:
+            name = f"{style}_{size}x{size}" + (f"_{algorithm}" if algorithm != "backtracker" else "")
+            maze_file = os.path.join(corpus_dir, f"{name}_{seed}.mz")
+            if not os.path.exists(maze_file):
+                loops = LOOP_FRACTION if style == "loopy" else 0.
+                write_maze_file(*generate_walls(size, size, seed, loops, algorithm), maze_file)
+            corpus.append((name, maze_file))
+    return corpus
+
+
+def _timed(function, repeat: int = 1):
+    """ Runs the function quietly and returns its last result and the fastest of its wall times """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            start = time.perf_counter()
+            result = function()
+            best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def time_phases(maze_file: str, phases: list[str], planners: list[str], repeat: int = 1) -> dict:
+    """ Times each phase on its own, on a freshly read maze, from the bottom left to the top right cell """
+    results = {}
+    maze, seconds = _timed(lambda: maze_reader(maze_file), repeat)
+    if "maze_reader" in phases:
+        results["maze_reader"] = {"seconds": seconds}
+    starting, goal = (0, 0), (maze.width - 1, maze.height - 1)
+
+    if "init" in phases:
+        results["init"] = {"seconds": _timed(lambda: Maze(maze.width, maze.height), repeat)[1]}
+
+    if "explore" in phases:
+        for planner in planners:
+            explorer = maze_reader(maze_file)
+            explorer.planner = planner
+            steps, seconds = _timed(lambda: explorer.explore(starting, goal))
+            path_length = len(_timed(lambda: explorer.known_path(starting, goal))[0]) + 1
+            results[f"explore:{planner}"] = {"seconds": seconds, "steps": steps, "seconds_per_step": seconds / steps,
+                                             "path_length": path_length, "score": steps / 4 + path_length}
+
+    if "flood_fill" in phases:
+        flood_array, seconds = _timed(lambda: maze.flood_fill(goal), repeat)
+        results["flood_fill"] = {"seconds": seconds, "cells": len(flood_array)}
+
+    if "dijkstra" in phases:
+        results["dijkstra"] = {"seconds": _timed(lambda: maze.dijkstra(starting, goal), repeat)[1],
+                               "path_length": len(maze.path) + 1}
+
+    if "render" in phases:
+        run_dir = tempfile.mkdtemp()
+        maze.run_id = os.path.relpath(os.path.join(run_dir, "frames"))
+        maze.render_settings = (True, False, 1, False, False, False, 0.998, 0.1, False, False, False, 5, "matplotlib",
+                                RESOLUTION)
+        results["render"] = {"seconds": _timed(lambda: maze.render(create_runner(*starting), goal, 0), repeat)[1]}
+        shutil.rmtree(run_dir)
+
+    if "raster_render" in phases:
+        run_dir = tempfile.mkdtemp()
+        maze.run_id = os.path.relpath(os.path.join(run_dir, "frames"))
+        maze.render_settings = (True, False, 1, False, False, False, 0.998, 0.1, False, False, False, 5, "raster",
+                                RESOLUTION)
+        results["raster_render"] = {"seconds": _timed(lambda: maze.render(create_runner(*starting), goal, 0),
+                                                      repeat)[1]}
+        maze.close_view()
+        shutil.rmtree(run_dir)
+    return results
+
+
+def compare_planners(results: dict) -> list[tuple[str, str, str, dict, dict]]:
+    """ Pairs the exploration with every other planner with the flood fill one on the same maze. Without a floodfill
+    run, the incremental planner stands in for it, as it takes the same route """
+    rows = []
+    for name, phases in results["mazes"].items():
+        reference = next((phase for phase in ("explore:floodfill", "explore:incremental") if phase in phases), None)
+        if reference is None:
+            continue
+        for phase, data in phases.items():
+            if phase.startswith("explore:") and phase not in ("explore:floodfill", reference):
+                rows.append((name, phase.split(":")[1], reference.split(":")[1], phases[reference], data))
+    return rows
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[tuple[str, str, float, float, str]]:
+    """ Pairs every phase with its baseline time. A phase regressed when it is slower by more than the tolerance """
+    rows = []
+    for name, phases in results["mazes"].items():
+        for phase, data in phases.items():
+            before = baseline["mazes"].get(name, {}).get(phase)
+            if before is None:
+                continue
+            ratio = data["seconds"] / before["seconds"] if before["seconds"] else float("inf")
+            if abs(data["seconds"] - before["seconds"]) < MIN_DIFFERENCE:
+                verdict = "same"
+            else:
+                verdict = "regressed" if ratio > 1 + tolerance else "improved" if ratio < 1 - tolerance else "same"
+            rows.append((name, phase, before["seconds"], data["seconds"], verdict))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ECS Maze Runner Benchmarks")
+
+    parser.add_argument("--sizes", help='The side lengths of the generated mazes.', nargs="+", type=int,
+                        default=[10, 100, 500, 1000])
+    parser.add_argument("--styles", help='Perfect mazes have a single route, loopy ones have '
+                                         f'{LOOP_FRACTION:.0%} of their inner walls removed.', nargs="+",
+                        choices=STYLES, default=list(STYLES))
+    parser.add_argument("--phases", help='The phases to time.', nargs="+", choices=PHASES, default=list(PHASES))
+    parser.add_argument("--planners", help='The planners the exploration is timed with.', nargs="+",
+                        choices=PLANNERS, default=["incremental", "astar"])
+    parser.add_argument("--seed", help='The seed of the generated mazes.', type=int, default=0)
+    parser.add_argument("--algorithm", help='How the mazes are carved, see maze_gen.py.', choices=ALGORITHMS,
+                        default="backtracker")
+    parser.add_argument("--repeat", help='How often the short phases are repeated, the fastest run counts.', type=int,
+                        default=3)
+    parser.add_argument("--corpus", help='The folder the generated mazes are kept in.', default=CORPUS_DIR)
+    parser.add_argument("--output", help='The JSON file the results are written to.', default="benchmark.json")
+    parser.add_argument("--compare", help='A previous results file to compare against.', default=None)
+    parser.add_argument("--tolerance", help='The relative slowdown that counts as a regression.', type=float,
+                        default=0.1)
+
+    args = parser.parse_args()
+    matplotlib.use("Agg")
+
+    results = {"meta": {"seed": args.seed, "python": platform.python_version(), "numpy": np.__version__,
+                        "machine": platform.machine(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+               "mazes": {}}
+    for name, maze_file in build_corpus(args.sizes, args.styles, args.seed, args.corpus, args.algorithm):
+        results["mazes"][name] = time_phases(maze_file, args.phases, args.planners, args.repeat)
+        for phase, data in results["mazes"][name].items():
+            extra = "  ".join(f"{key}={value:.6g}" for key, value in data.items() if key != "seconds")
+            print(f"{name:>16} {phase:>22} {data['seconds']:>10.4f}s  {extra}")
+
+    for name, planner, reference, flood, data in compare_planners(results):
+        print(f"{name:>16} {planner:>11} vs {reference}: steps {data['steps']} vs {flood['steps']}, score "
+              f"{data['score']:g} vs {flood['score']:g}, speedup {flood['seconds'] / data['seconds']:.2f}x")
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results saved as {args.output}")
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        rows = compare(results, baseline, args.tolerance)
+        for name, phase, before, after, verdict in rows:
+            print(f"{name:>16} {phase:>22} {before:>10.4f}s -> {after:>10.4f}s  {verdict}")
+        if any(verdict == "regressed" for *_, verdict in rows):
+            sys.exit(1)
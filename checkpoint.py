@@ -0,0 +1,73 @@
+import os
+import struct
+
+import numpy as np
+
+from exploration_log import ACTIONS
+
+CHECKPOINT_FILE = "checkpoint.xcp"
+# Magic bytes, format version, width and height, starting cell, goal, step counter, the runner's cell and orientation,
+# planner, exploration log format and the log's position: its length, the action and length of the run an RLE log has
+# not written yet, and the number of walls, visited cells, route cells and rows that follow. Then the cells below the
+# known horizontal inner walls of the mind maze and left of its vertical ones, the visited cells and the route of the
+# astar planner, each as (x, y) pairs, and last the exploration rows kept in memory as x, y and action code columns
+MAGIC = b"XCP\0"
+VERSION = 2
+HEADER = struct.Struct("<4sHIIIIIIQIIBBBQBBQQQQQ")
+PLANNER_CODES = ("floodfill", "incremental", "astar")
+LOG_CODES = (None, "csv", "rle")
+NO_ACTION = 255
+
+
+def write_checkpoint(checkpoint_file: str, state: dict[str, any]):
+    """ Writes the state next to the checkpoint and renames it over the previous one once it is on disk, so a crash
+    while writing always leaves a complete checkpoint behind """
+    width, height = state["width"], state["height"]
+    offset, action, count = state["log_position"]
+    north, east, visited = (np.asarray(state[key], dtype=np.uint32) for key in ("north", "east", "visited"))
+    route = np.asarray(state["route"] or [], dtype=np.uint32).reshape(-1, 2)
+    rows = state["rows"]
+    header = HEADER.pack(MAGIC, VERSION, width, height, *state["starting"], *state["goal"], state["steps"],
+                         *state["runner"], PLANNER_CODES.index(state["planner"]), LOG_CODES.index(state["log_format"]),
+                         offset, NO_ACTION if action is None else ACTIONS.index(action), count, len(north), len(east),
+                         len(visited), len(route), 0 if rows is None else len(rows[0]))
+
+    tmp_file = f"{checkpoint_file}.tmp"
+    with open(tmp_file, "wb") as file:
+        file.write(header)
+        for cells in (north, east, visited, route):
+            file.write(cells.tobytes())
+        if rows is not None:
+            xs, ys, actions = rows
+            file.write(np.asarray(xs, dtype=np.uint32).tobytes())
+            file.write(np.asarray(ys, dtype=np.uint32).tobytes())
+            file.write(np.asarray(actions, dtype=np.uint8).tobytes())
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_file, checkpoint_file)
+
+
+def read_checkpoint(checkpoint_file: str) -> dict[str, any]:
+    data = np.fromfile(checkpoint_file, dtype=np.uint8)
+    if data.size < HEADER.size:
+        raise ValueError(f"{checkpoint_file} is too short to be a checkpoint.")
+    (magic, version, width, height, start_x, start_y, goal_x, goal_y, steps, x, y, orientation, planner, log_format,
+     offset, action, count, north_count, east_count, visited_count, route_length, row_count) = HEADER.unpack(data[:HEADER.size].tobytes())
+    if magic != MAGIC:
+        raise ValueError(f"{checkpoint_file} is not a checkpoint.")
+    if version != VERSION:
+        raise ValueError(f"{checkpoint_file} uses version {version} of the checkpoint format, expected {VERSION}.")
+
+    sizes = [north_count * 8, east_count * 8, visited_count * 8, route_length * 8, row_count * 4, row_count * 4,
+             row_count]
+    if data.size != HEADER.size + sum(sizes):
+        raise ValueError(f"{checkpoint_file} is incomplete.")
+    sections = np.split(data[HEADER.size:], np.cumsum(sizes)[:-1])
+    return {"width": width, "height": height, "starting": (start_x, start_y), "goal": (goal_x, goal_y),
+            "steps": steps, "runner": (x, y, orientation), "planner": PLANNER_CODES[planner],
+            "log_format": LOG_CODES[log_format],
+            "log_position": (offset, None if action == NO_ACTION else ACTIONS[action], count),
+            "north": sections[0].view(np.uint32).reshape(-1, 2), "east": sections[1].view(np.uint32).reshape(-1, 2),
+            "visited": sections[2].view(np.uint32).reshape(-1, 2),
+            "route": sections[3].view(np.uint32).reshape(-1, 2).tolist() if route_length else None,
+            "rows": (sections[4].view(np.uint32), sections[5].view(np.uint32), sections[6]) if row_count else None}
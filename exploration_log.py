@@ -0,0 +1,154 @@
+import argparse
+import csv
+import os
+import struct
+
+HEADER_ROW = ["Step", "x-coordinate", "y-coordinate", "Actions"]
+# The runner turns at most twice before each step forward, so these are all the actions a step can have
+ACTIONS = ("F", "LF", "RF", "LLF")
+BUFFER_SIZE = 1 << 20
+# The coordinate offset of a step forward in N, E, S, W order, as in maze.py
+OFFSETS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+# Magic bytes, format version and the runner's starting cell and orientation, followed by one byte per run of equal
+# actions: the action code in the top two bits and the length of the run minus one in the lower six. The cell of every
+# step follows from the starting cell and the actions before it, so it is not stored
+MAGIC = b"XRL\0"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sHIIB")
+MAX_RUN = 64
+# The number of quarter turns to the right each action makes before its step forward
+TURNS = {"F": 0, "LF": 3, "RF": 1, "LLF": 2}
+ORIENTATIONS = ("N", "E", "S", "W")
+LOG_FILES = {"csv": "exploration.csv", "rle": "exploration.xrl"}
+
+
+class CsvLog:
+    """ Writes the exploration rows to a CSV file through a buffer as they come in, with the same content
+    build_files writes from the rows kept in memory """
+
+    def __init__(self, log_file: str, position: tuple[int, str | None, int] | None = None):
+        if position is None:
+            self._file = open(log_file, "w", newline="", buffering=BUFFER_SIZE)
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(HEADER_ROW)
+            return
+        # A resumed run drops whatever was written after its checkpoint and carries on from there
+        self._file = open(log_file, "r+", newline="", buffering=BUFFER_SIZE)
+        self._file.seek(position[0])
+        self._file.truncate()
+        self._writer = csv.writer(self._file)
+
+    def write(self, step: int, x: int, y: int, action: str):
+        self._writer.writerow((step, x, y, action))
+
+    def position(self) -> tuple[int, str | None, int]:
+        """ Where the log continues after a checkpoint, see RleLog.position """
+        self._file.flush()
+        return self._file.tell(), None, 0
+
+    def close(self):
+        self._file.close()
+
+
+class RleLog:
+    """ Writes the exploration as run-length-encoded actions, as long runs of straight "F" steps make up most of an
+    exploration. The run waiting for its next step is only written once that step does not continue it """
+
+    def __init__(self, log_file: str, starting: tuple[int, int], orientation: str = "N",
+                 position: tuple[int, str | None, int] | None = None):
+        if position is None:
+            self._file = open(log_file, "wb", buffering=BUFFER_SIZE)
+            self._file.write(FILE_HEADER.pack(MAGIC, VERSION, starting[0], starting[1],
+                                              ORIENTATIONS.index(orientation)))
+            self._action = None
+            self._count = 0
+            return
+        self._file = open(log_file, "r+b", buffering=BUFFER_SIZE)
+        self._file.seek(position[0])
+        self._file.truncate()
+        _, self._action, self._count = position
+
+    def write(self, step: int, x: int, y: int, action: str):
+        if action == self._action and self._count < MAX_RUN:
+            self._count += 1
+            return
+        self._flush_run()
+        self._action = action
+        self._count = 1
+
+    def position(self) -> tuple[int, str | None, int]:
+        """ The length of the log on disk and the run that is not written yet, from which a resumed run continues """
+        self._file.flush()
+        return self._file.tell(), self._action, self._count
+
+    def _flush_run(self):
+        if self._count:
+            self._file.write(bytes((ACTIONS.index(self._action) << 6 | self._count - 1,)))
+
+    def close(self):
+        self._flush_run()
+        self._file.close()
+
+
+def open_log(run_id: str, log_format: str, starting: tuple[int, int],
+             position: tuple[int, str | None, int] | None = None):
+    """ Creates the run's folder and the exploration log of the given format in it, or continues the log at the
+    position of a checkpoint """
+    try:
+        os.mkdir(run_id)
+    except FileExistsError:
+        pass
+    log_file = os.path.join(run_id, LOG_FILES[log_format])
+    return CsvLog(log_file, position) if log_format == "csv" else RleLog(log_file, starting, position=position)
+
+
+def read_log(log_file: str):
+    """ Yields the header and then every exploration row, as [step, x, y, action], from a log of either format """
+    yield HEADER_ROW
+    if not log_file.endswith(".xrl"):
+        with open(log_file, newline="") as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            for step, x, y, action in reader:
+                yield [int(step), int(x), int(y), action]
+        return
+
+    with open(log_file, "rb") as file:
+        header = file.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size:
+            raise ValueError(f"{log_file} is too short to be an exploration log.")
+        magic, version, x, y, orientation = FILE_HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{log_file} is not an exploration log.")
+        if version != VERSION:
+            raise ValueError(f"{log_file} uses version {version} of the exploration log format, expected {VERSION}.")
+
+        step = 0
+        while chunk := file.read(BUFFER_SIZE):
+            for record in chunk:
+                action = ACTIONS[record >> 6]
+                for _ in range(1 + (record & (MAX_RUN - 1))):
+                    step += 1
+                    yield [step, x, y, action]
+                    orientation = (orientation + TURNS[action]) % 4
+                    dx, dy = OFFSETS[orientation]
+                    x += dx
+                    y += dy
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ECS Maze Runner Exploration Log Converter")
+
+    parser.add_argument("log", help='The exploration log of a run, e.g., maze1__<id>/exploration.xrl')
+    parser.add_argument("output", help='The name of the CSV file, defaults to the log name with .csv', nargs="?",
+                        default=None)
+
+    args = parser.parse_args()
+
+    output = args.output if args.output is not None else os.path.splitext(args.log)[0] + ".csv"
+    if os.path.abspath(output) == os.path.abspath(args.log):
+        parser.error("The CSV file would overwrite the log it is read from.")
+    with open(output, "w", newline="") as file:
+        csv.writer(file).writerows(read_log(args.log))
+    print(f"Exploration log saved as {output}")
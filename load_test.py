@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+from maze import PLANNERS
+from solve_client import SolveClient
+from solve_server import HOST, PORT
+
+# How often the event loop of the server is checked with a ping while the solve requests run
+PING_INTERVAL = 0.05
+
+
+def _percentile(values: list[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(share * len(ordered)), len(ordered) - 1)] if ordered else 0.
+
+
+async def _start_server(root: str, host: str, port: int, workers: int) -> asyncio.subprocess.Process:
+    """ Starts a local solve server and waits until it listens """
+    server = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "solve_server.py"), "--root", root,
+        "--host", host, "--port", str(port), "--workers", str(workers), stdout=asyncio.subprocess.PIPE)
+    line = await server.stdout.readline()
+    if not line.startswith(b"Solve server listening"):
+        server.kill()
+        raise RuntimeError("The solve server did not start.")
+    return server
+
+
+async def _pings(client: SolveClient, done: asyncio.Event, latencies: list[float]):
+    while not done.is_set():
+        start = time.perf_counter()
+        await client.command("ping")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(PING_INTERVAL)
+
+
+async def _worker(client: SolveClient, queue: asyncio.Queue, latencies: list[float], errors: list[str]):
+    while True:
+        try:
+            maze, starting, goal, planner = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        try:
+            await client.solve(maze, starting, goal, planner)
+        except RuntimeError as error:
+            errors.append(str(error))
+        latencies.append(time.perf_counter() - start)
+
+
+async def load_test(args):
+    server = await _start_server(args.root, args.host, args.port, args.workers) if args.spawn else None
+    try:
+        rng = random.Random(args.seed)
+        queue = asyncio.Queue()
+        for _ in range(args.requests):
+            queue.put_nowait((rng.choice(args.mazes), args.starting, args.goal, args.planner))
+
+        clients = [await SolveClient.connect(args.host, args.port) for _ in range(args.concurrency + 1)]
+        latencies, ping_latencies, errors = [], [], []
+        done = asyncio.Event()
+        pings = asyncio.create_task(_pings(clients[-1], done, ping_latencies))
+        start = time.perf_counter()
+        await asyncio.gather(*(_worker(client, queue, latencies, errors) for client in clients[:-1]))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await pings
+        stats = await clients[-1].command("stats")
+        for client in clients:
+            await client.close()
+    finally:
+        if server is not None:
+            server.terminate()
+            await server.wait()
+
+    print(f"{args.requests} requests at concurrency {args.concurrency} in {elapsed:.2f} s, "
+          f"{args.requests / elapsed:.2f} requests/s, {len(errors)} errors")
+    print(f"Latency: p50 {_percentile(latencies, 0.5) * 1000:.1f} ms, "
+          f"p95 {_percentile(latencies, 0.95) * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms")
+    if ping_latencies:
+        print(f"Ping during load: p50 {statistics.median(ping_latencies) * 1000:.2f} ms, "
+              f"max {max(ping_latencies) * 1000:.2f} ms over {len(ping_latencies)} pings")
+    print("Maze pool:", ", ".join(f"{key} {value}" for key, value in stats["pool"].items()))
+    for error in sorted(set(errors)):
+        print("Error:", error)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ECS Maze Runner Solve Server Load Test")
+
+    parser.add_argument("mazes", help='The maze files below the server\'s maze folder the requests pick from at '
+                                      'random, e.g., maze1.mz maze2.mz', nargs="+")
+    parser.add_argument("--requests", help='The amount of solve requests.', type=int, default=50)
+    parser.add_argument("--concurrency", help='The amount of connections sending requests at the same time.',
+                        type=int, default=4)
+    parser.add_argument("--starting", help='The starting position of every request, e.g., "0, 1"', default=None)
+    parser.add_argument("--goal", help='The goal position of every request, e.g., "4, 4"', default=None)
+    parser.add_argument("--planner", help="How the flood values are updated after each step.",
+                        choices=PLANNERS, default="floodfill")
+    parser.add_argument("--seed", help='The seed of the order the mazes are picked in.', type=int, default=0)
+    parser.add_argument("--spawn", help='Starts a local server for the test and stops it afterwards.',
+                        action="store_true")
+    parser.add_argument("--root", help='The maze folder of the spawned server.', default=".")
+    parser.add_argument("--workers", help='The amount of processes of the spawned server.', type=int,
+                        default=os.cpu_count())
+    parser.add_argument("--host", help='The address of the server.', default=HOST)
+    parser.add_argument("--port", help='The port of the server.', type=int, default=PORT)
+
+    args = parser.parse_args()
+
+    if args.requests < 1 or args.concurrency < 1:
+        parser.error("At least one request and one connection are needed.")
+    asyncio.run(load_test(args))
@@ -1,62 +1,132 @@
 import csv
-import gc
-from math import sqrt
+import heapq
+import itertools
+import time
+from collections.abc import Mapping
 
+import numpy as np
 from alive_progress import alive_bar
 
-from runner import create_runner, get_x, get_y, get_orientation, turn, forward, orientation_options
+from checkpoint import CHECKPOINT_FILE, read_checkpoint, write_checkpoint
+from exploration_log import ACTIONS, HEADER_ROW, open_log
+from metrics import metrics, timed
+from raster import RESOLUTION, RasterView
+from rendering import (ARROW_OFFSETS, FLOOD_TEXT_LIMIT, LiveView, close_video, colored_cells, flood_heatmap, setup_axes,
+                       wall_segments, write_video_frame)
+from runner import LEFT, SENSED, STEPS, Runner, create_runner, get_x, get_y, get_orientation, forward
 import matplotlib.pyplot as plt
-from matplotlib import patches
+from matplotlib.collections import LineCollection, PolyCollection
 import os
-import random
+
+# Wall bits of a cell in N, E, S, W order and the coordinate offset to the neighbor behind each of them
+NORTH, EAST, SOUTH, WEST = 1, 2, 4, 8
+WALL_BITS = (NORTH, EAST, SOUTH, WEST)
+OFFSETS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+# The wall bits to the left of, in front of and to the right of a runner, for each of its orientations
+SENSED_BITS = tuple(tuple(WALL_BITS[direction] for direction in sensed) for sensed in SENSED)
+# The action that moves into the cell to the left, in front or to the right, and the one for turning around
+TURN_ACTIONS = ("LF", "F", "RF")
+TURN_AROUND = "LLF"
+# How the mind maze's flood values are worked out after each step
+PLANNERS = ("floodfill", "incremental", "astar")
+
+
+class ImpliedDistances(dict):
+    """ The distance of every cell to the goal. A cell that was never stored is as far away as on a maze without inner
+    walls, so a fresh mind maze needs no per-cell state. Cells that can not reach the goal are stored as None """
+
+    def __init__(self, goal: tuple[int, int]):
+        super().__init__()
+        self.goal = goal
+
+    def __missing__(self, cell):
+        return abs(cell[0] - self.goal[0]) + abs(cell[1] - self.goal[1])
+
+
+class FloodValues(Mapping):
+    """ The flood values of the incremental planner, worked out from its distances and the heuristic when read """
+
+    def __init__(self, depth: ImpliedDistances, width: int, height: int, heuristic: np.ndarray | None = None):
+        self._depth = depth
+        self._width = width
+        self._height = height
+        self._heuristic = heuristic
+
+    def __getitem__(self, cell):
+        x, y = cell
+        value = self._depth[cell] if 0 <= x < self._width and 0 <= y < self._height else None
+        if value is None:
+            raise KeyError(cell)
+        if cell == self._depth.goal:
+            return 0
+        return value + self._heuristic.item(x, y) if self._heuristic is not None else value
+
+    def __iter__(self):
+        depth = self._depth
+        return ((x, y) for x in range(self._width) for y in range(self._height) if depth[(x, y)] is not None)
+
+    def __len__(self):
+        # Only the stored distances can be None, every other cell is as far away as on an empty maze
+        return self._width * self._height - sum(1 for value in self._depth.values() if value is None)
+
+    def __bool__(self):
+        # The goal always has a value
+        return True
+
+    def grid(self) -> np.ndarray:
+        """ The flood values as a (width, height) array, with infinity for the cells that can not reach the goal """
+        goal = self._depth.goal
+        values = (np.abs(np.arange(self._width, dtype=np.float64) - goal[0])[:, None]
+                  + np.abs(np.arange(self._height, dtype=np.float64) - goal[1]))
+        for (x, y), value in self._depth.items():
+            values[x, y] = np.inf if value is None else value
+        if self._heuristic is not None:
+            values += self._heuristic
+        values[goal] = 0
+        return values
 
 
 class Maze:
-    def __init__(self, width: int = 5, height: int = 5):
-        """ Constructs the initial maze with outer walls with given dimensions """
+    def __init__(self, width: int = 5, height: int = 5, walls=None):
+        """ Constructs the initial maze with outer walls with given dimensions. walls can be given instead, e.g. the
+        TiledWalls of a maze kept on disk, and then already hold the outer walls """
         self._width = width
         self._height = height
-        self._h_walls = set()
-        self._v_walls = set()
-        self._flood_array = {}
+        self._walls = np.zeros((width, height), dtype=np.uint8) if walls is None else walls
+        # None until the first step plans the flood values
+        self._flood_array = None
         self._mind_maze = None
         self._visited_cells = set()
         self._path = []
         self.prev_runner = ()
         self.exploration_data = []
+        # None keeps the exploration rows in exploration_data, "csv" or "rle" streams them into the run's folder
+        self.log_format = None
+        self.steps = 0
         self.final_path = []
-        self.all_walls = {}
-        self._render_settings = (False, False, 1, False, False, False, 0.998, 0.1, False)
+        self._render_settings = (False, False, 1, False, False, False, 0.998, 0.1, False, False, False, 5, "matplotlib",
+                                 RESOLUTION)
         # Save images, display images, display time, floodfill data display, euclidian_only, Hope_mode, decay rate,
-        # exploration factor, heatmap
-        self.heuristic = {}
+        # exploration factor, heatmap, live view, video, video frame rate, renderer, raster resolution
+        self._live_view = None
+        self._raster_view = None
+        self.heuristic = None
         self.run_id = ""
-
-        for i in range(height):
-            self._v_walls.add((0, i))
-            self._v_walls.add((width, i))
-
-        for i in range(width):
-            self._h_walls.add((i, 0))
-            self._h_walls.add((i, height))
-
-        rows = range(self.width)
-        columns = range(self.height)
-        coordinates = [(r, c) for r in rows for c in columns]
-        for i, (x, y) in enumerate(coordinates):
-            self.all_walls[(x, y)] = [False, False, False, False]
-            if x == 0:
-                self.all_walls[(x, y)][3] = True
-            if x == self.width - 1:
-                self.all_walls[(x, y)][1] = True
-            if y == 0:
-                self.all_walls[(x, y)][2] = True
-            if y == self.height - 1:
-                self.all_walls[(x, y)][0] = True
-            if i % 70000 == 0:
-                print(i/(width*height))
-                gc.collect()
-        gc.collect()
+        self.planner = "floodfill"
+        self.seed = None
+        self._flood_depth = None
+        # The route of the astar planner from the goal back to the runner's cell
+        self._route = None
+        # The steps and seconds between checkpoints of an exploration in the run's folder, None for neither
+        self.checkpoint_steps = None
+        self.checkpoint_seconds = None
+        self._resume = None
+
+        if walls is None and width > 0 and height > 0:
+            self._walls[0, :] |= WEST
+            self._walls[-1, :] |= EAST
+            self._walls[:, 0] |= SOUTH
+            self._walls[:, -1] |= NORTH
 
     @property
     def width(self) -> int:
@@ -90,79 +160,139 @@ class Maze:
     def render_settings(self, settings: tuple[bool, bool, int, bool]):
         self._render_settings = settings
 
+    @property
+    def tiled(self) -> bool:
+        """ Whether the walls are kept in tiles on disk instead of a NumPy grid """
+        return not isinstance(self._walls, np.ndarray)
+
+    @property
+    def wall_grid(self) -> np.ndarray:
+        """ The N, E, S, W wall bits of every cell, indexed [x, y]. Tiled walls are read into memory for it """
+        return self._walls.to_array() if self.tiled else self._walls
+
+    def _wall_view(self):
+        """ The fastest way to read single cells' wall bits as ints with [x, y] """
+        return self._walls if self.tiled else memoryview(self._walls)
+
+    def _wall_blocks(self):
+        """ The lower left cell and wall bits of each block the walls are stored in, a single one unless tiled. Tiles
+        that never held a wall, like most of a tiled mind maze, are skipped """
+        return self._walls.blocks(walled_only=True) if self.tiled else [(0, 0, self._walls)]
+
+    def wall_region(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """ The wall bits of the cells from (x0, y0) up to, but not including, (x1, y1), without reading all tiles """
+        return self._walls.region(x0, y0, x1, y1) if self.tiled else self._walls[x0:x1, y0:y1]
+
+    def blank_copy(self) -> "Maze":
+        """ A maze of the same size with only the outer walls, tiled on disk if this one is """
+        return Maze(self._width, self._height, walls=self._walls.blank() if self.tiled else None)
+
+    @property
+    def horizontal_walls(self) -> list[tuple[int, int]]:
+        """ The (x, horizontal line) pair of every horizontal wall, including the outer ones """
+        grid = self.wall_grid
+        xs, ys = np.nonzero(grid & SOUTH)
+        top = np.nonzero(grid[:, -1] & NORTH)[0]
+        return list(zip(xs.tolist(), ys.tolist())) + [(x, self._height) for x in top.tolist()]
+
+    @property
+    def vertical_walls(self) -> list[tuple[int, int]]:
+        """ The (vertical line, y) pair of every vertical wall, including the outer ones """
+        grid = self.wall_grid
+        xs, ys = np.nonzero(grid & WEST)
+        right = np.nonzero(grid[-1, :] & EAST)[0]
+        return list(zip(xs.tolist(), ys.tolist())) + [(self._width, y) for y in right.tolist()]
+
     def set_all_walls(self, coord, index):
-        self.all_walls[coord][index] = True
+        self._walls[coord] |= WALL_BITS[index]
 
     def add_horizontal_wall(self, x_coordinate: int, horizontal_line: int):
         if 0 <= x_coordinate < self._width and 1 <= horizontal_line < self._height:
-            self._h_walls.add((x_coordinate, horizontal_line))
+            self._walls[x_coordinate, horizontal_line] |= SOUTH
+            self._walls[x_coordinate, horizontal_line - 1] |= NORTH
 
     def add_vertical_wall(self, y_coordinate: int, vertical_line: int):
         if 0 <= y_coordinate < self._height and 1 <= vertical_line < self._width:
-            self._v_walls.add((vertical_line, y_coordinate))
+            self._walls[vertical_line, y_coordinate] |= WEST
+            self._walls[vertical_line - 1, y_coordinate] |= EAST
+
+    def add_walls(self, horizontal: np.ndarray, vertical: np.ndarray):
+        """ Adds many inner walls at once. horizontal[x, line - 1] is the wall on horizontal line 1 to height - 1 above
+        cell x and vertical[line - 1, y] the wall on vertical line 1 to width - 1 next to row y """
+        if self.tiled:
+            self._walls.add_walls(horizontal, vertical)
+            return
+        horizontal = horizontal.astype(np.uint8)
+        vertical = vertical.astype(np.uint8)
+        self._walls[:, 1:] |= horizontal * np.uint8(SOUTH)
+        self._walls[:, :-1] |= horizontal * np.uint8(NORTH)
+        self._walls[1:, :] |= vertical * np.uint8(WEST)
+        self._walls[:-1, :] |= vertical * np.uint8(EAST)
+
+    def inner_walls(self) -> tuple[np.ndarray, np.ndarray]:
+        """ The inner walls in the layout add_walls takes them """
+        grid = self.wall_grid
+        return (grid[:, 1:] & SOUTH) != 0, (grid[1:, :] & WEST) != 0
+
+    def add_wall(self, x_coordinate: int, y_coordinate: int, direction: int) -> bool:
+        """ Adds the wall on one side (0: N, 1: E, 2: S, 3: W) of a cell, on both cells it separates, and returns
+        whether it was not known before """
+        bit = WALL_BITS[direction]
+        is_new = not self._walls[x_coordinate, y_coordinate] & bit
+        self._walls[x_coordinate, y_coordinate] |= bit
+        dx, dy = OFFSETS[direction]
+        if 0 <= x_coordinate + dx < self._width and 0 <= y_coordinate + dy < self._height:
+            self._walls[x_coordinate + dx, y_coordinate + dy] |= WALL_BITS[(direction + 2) % 4]
+        return is_new
 
     def get_walls(self, x_coordinate: int, y_coordinate: int) -> tuple[bool, bool, bool, bool]:
-        h_walls = self._h_walls
-        v_walls = self._v_walls
-        north = (x_coordinate, y_coordinate + 1) in h_walls
-        east = (x_coordinate + 1, y_coordinate) in v_walls
-        south = (x_coordinate, y_coordinate) in h_walls
-        west = (x_coordinate, y_coordinate) in v_walls
-
-        return north, east, south, west
-
-    def sense_walls(self, runner: dict[str, any]) -> tuple[bool, bool, bool]:
-        walls = self.get_walls(get_x(runner), get_y(runner))
-        sensed_walls = []
-        wall_num = 0
-        orientations = orientation_options(runner)
-        for orientation in orientations:
-            if orientation == "N":
-                wall_num = 0
-            elif orientation == "S":
-                wall_num = 2
-            elif orientation == "E":
-                wall_num = 1
-            elif orientation == "W":
-                wall_num = 3
-            sensed_walls.append(walls[wall_num])
-        sensed_walls = tuple(sensed_walls)
-        return sensed_walls
+        walls = int(self._walls[x_coordinate, y_coordinate])
+        return bool(walls & NORTH), bool(walls & EAST), bool(walls & SOUTH), bool(walls & WEST)
+
+    def sense_walls(self, runner: Runner) -> tuple[bool, bool, bool]:
+        """ Whether there is a wall to the left of, in front of and to the right of the runner """
+        walls = self._walls.item(runner.x, runner.y)
+        left, front, right = SENSED_BITS[runner.orientation]
+        return bool(walls & left), bool(walls & front), bool(walls & right)
 
     def go_straight(self, runner):
-        if not self.sense_walls(runner)[1]:
+        if not self._walls.item(runner.x, runner.y) & WALL_BITS[runner.orientation]:
             runner = forward(runner)
         else:
             raise ValueError()
         return runner
 
-    def get_open_neighbors(self, runner, goal, num):
-        x = get_x(runner)
-        y = get_y(runner)
-        neighbors = [(x, y + 1), (x + 1, y), (x, y - 1), (x - 1, y)]
-        neighbors_orientations = ["N", "E", "S", "W"]
+    def _sense_and_update(self, runner, goal, num) -> tuple[bool, bool, bool]:
+        """ Senses the walls around the runner and updates the mind maze and its flood values with them """
         walls = self.sense_walls(runner)  # direction to the left, current direction, direction to the right
+        if self._mind_maze is None:
+            self._mind_maze = self.blank_copy()
         self._mind_maze, self._flood_array = update_maze(runner, walls, goal, num, self.render_settings, self.run_id, maze=self._mind_maze,
-                                                         width=self._width, height=self._height)
-        walls_orientations = orientation_options(runner)
-        indices = [neighbors_orientations.index(orientation) for orientation in walls_orientations if not walls[walls_orientations.index(orientation)]]
-        return_list = [neighbors[i] for i in indices]
+                                                         width=self._width, height=self._height, planner=self.planner,
+                                                         seed=self.seed)
+        return walls
 
-        return return_list
+    def get_open_neighbors(self, runner, goal, num):
+        x = runner.x
+        y = runner.y
+        walls = self._sense_and_update(runner, goal, num)
+        return [(x + STEPS[direction][0], y + STEPS[direction][1])
+                for sensed, direction in zip(walls, SENSED[runner.orientation]) if not sensed]
 
+    @timed("flood_fill")
     def flood_fill(self, goal):
         queue = [goal]
         flood_array = {goal: 0}
         fill_value = 1
-        heuristic = self.heuristic
-        all_walls = self.all_walls
+        heuristic = memoryview(self.heuristic) if self.heuristic is not None else None
+        all_walls = self._wall_view()
 
         while queue:
             next_queue = []
             for x, y in queue:
-                walls = tuple(all_walls[(x, y)])
-                for i, n_coord in enumerate([(x, y + 1), (x + 1, y), (x, y - 1), (x - 1, y)]):
-                    if not walls[i] and n_coord not in flood_array:
+                walls = all_walls[x, y]
+                for bit, n_coord in zip(WALL_BITS, [(x, y + 1), (x + 1, y), (x, y - 1), (x - 1, y)]):
+                    if not walls & bit and n_coord not in flood_array:
                         if self.render_settings[4] or self.render_settings[5]:
                             flood_array[n_coord] = fill_value + heuristic[n_coord]
                         else:
@@ -171,141 +301,381 @@ class Maze:
 
             queue = next_queue
             fill_value += 1
+        metrics.observe("flood_fill_cells", len(flood_array))
         return flood_array
 
+    @timed("flood_fill")
+    def distance_field(self, goal: tuple[int, int]) -> np.ndarray:
+        """ The number of steps from every cell to the goal as a (width, height) array, -1 for the cells that can not
+        reach it. A breadth-first search like flood_fill, but on flat cell numbers x * height + y and lists, which
+        keeps the whole maze's distances in 4 bytes per cell instead of a dict """
+        height = self._height
+        walls = self.wall_grid.reshape(-1).tolist()
+        # The flat offsets to the neighbors in N, E, S, W order. The outer walls keep every step inside the maze
+        steps = tuple(zip(WALL_BITS, (1, height, -1, -height)))
+        distances = [-1] * len(walls)
+        start = goal[0] * height + goal[1]
+        distances[start] = 0
+        queue = [start]
+        fill_value = 1
+        while queue:
+            next_queue = []
+            for cell in queue:
+                cell_walls = walls[cell]
+                for bit, offset in steps:
+                    neighbor = cell + offset
+                    if not cell_walls & bit and distances[neighbor] < 0:
+                        distances[neighbor] = fill_value
+                        next_queue.append(neighbor)
+            queue = next_queue
+            fill_value += 1
+        return np.array(distances, dtype=np.int32).reshape(self._width, height)
+
+    @timed("flood_fill")
+    def incremental_flood_fill(self, goal, new_walls: list[tuple[tuple[int, int], int]]):
+        """ Keeps the distances of the previous step and only repairs the cells whose distance to the goal grew because
+        of the newly added walls, giving the same values as a full flood_fill. The distances start out as on a maze
+        without inner walls, with all walls known by then counting as new ones """
+        depth = self._flood_depth
+        if depth is None or depth.goal != goal:
+            depth = self._flood_depth = ImpliedDistances(goal)
+            new_walls = self.known_inner_walls()
+        affected = self._invalidated_cells(goal, new_walls)
+        metrics.observe("flood_fill_cells", len(affected))
+
+        all_walls = self._wall_view()
+
+        # Every affected cell restarts from its best neighbor that kept its distance
+        heap = []
+        for cell in affected:
+            depth[cell] = None
+        for x, y in affected:
+            if (x, y) == goal:
+                heap.append((0, (x, y)))
+                continue
+            walls = all_walls[x, y]
+            best = min((fill_value for fill_value in (depth[(x + dx, y + dy)] for bit, (dx, dy) in zip(WALL_BITS, OFFSETS)
+                                                      if not walls & bit) if fill_value is not None), default=None)
+            if best is not None:
+                heap.append((best + 1, (x, y)))
+        heapq.heapify(heap)
+
+        while heap:
+            fill_value, (x, y) = heapq.heappop(heap)
+            if depth[(x, y)] is not None:
+                continue
+            depth[(x, y)] = fill_value
+            walls = all_walls[x, y]
+            for bit, (dx, dy) in zip(WALL_BITS, OFFSETS):
+                n_coord = (x + dx, y + dy)
+                if not walls & bit and n_coord in affected and depth[n_coord] is None:
+                    heapq.heappush(heap, (fill_value + 1, n_coord))
+
+        use_heuristic = self.render_settings[4] or self.render_settings[5]
+        self._flood_array = FloodValues(depth, self._width, self._height, self.heuristic if use_heuristic else None)
+        return self._flood_array
+
+    @timed("flood_fill")
+    def astar(self, start: tuple[int, int], goal: tuple[int, int], blocked: int = 0) -> dict[tuple[int, int], int]:
+        """ The steps left to the goal for the cells of a shortest route from the start on the known walls. The route
+        of the previous step is kept while the runner follows it and no wall cuts it, as new walls only make other
+        routes longer. Otherwise A* plans a new one, guided by the distance on a maze without inner walls, so it only
+        expands cells that could lie on a route as short as the best one. The wall bits in blocked count as walls of
+        the start cell """
+        route = self._route
+        all_walls = self._wall_view()
+        if route is not None and route[0] == goal and len(route) > 2 and route[-2] == start:
+            del self._flood_array[route.pop()]
+            (x, y), (next_x, next_y) = start, route[-2]
+            if not all_walls[x, y] & WALL_BITS[OFFSETS.index((next_x - x, next_y - y))]:
+                metrics.observe("flood_fill_cells", 0)
+                return self._flood_array
+
+        metrics.count("astar_plans")
+        goal_x, goal_y = goal
+        parents = {start: None}
+        distances = {start: 0}
+        # Ties go to the cell furthest from the start, which keeps the search on one route through open space
+        heap = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), 0, start)]
+        expanded = 0
+        while heap:
+            _, fill_value, (x, y) = heapq.heappop(heap)
+            fill_value = -fill_value
+            if (x, y) == goal:
+                break
+            if fill_value > distances[(x, y)]:
+                continue
+            expanded += 1
+            walls = all_walls[x, y] if (x, y) != start else all_walls[x, y] | blocked
+            for bit, (dx, dy) in zip(WALL_BITS, OFFSETS):
+                n_coord = (x + dx, y + dy)
+                if not walls & bit and (n_coord not in distances or fill_value + 1 < distances[n_coord]):
+                    distances[n_coord] = fill_value + 1
+                    parents[n_coord] = (x, y)
+                    heapq.heappush(heap, (fill_value + 1 + abs(n_coord[0] - goal_x) + abs(n_coord[1] - goal_y),
+                                          -fill_value - 1, n_coord))
+        metrics.observe("flood_fill_cells", expanded)
+
+        if goal not in parents:
+            self._route = None
+            return {}
+        route = [goal]
+        while route[-1] != start:
+            route.append(parents[route[-1]])
+        self._route = route
+        return {cell: fill_value for fill_value, cell in enumerate(route)}
+
+    def known_inner_walls(self) -> list[tuple[tuple[int, int], int]]:
+        """ Every inner wall once, as the cell below or left of it and the direction (0: N, 1: E) it lies in """
+        north, east = self.inner_wall_cells()
+        return [(cell, 0) for cell in map(tuple, north.tolist())] + [(cell, 1) for cell in map(tuple, east.tolist())]
+
+    def inner_wall_cells(self) -> tuple[np.ndarray, np.ndarray]:
+        """ The (x, y) rows of the cells below each inner horizontal wall and left of each inner vertical one. Tiled
+        walls are read a tile at a time, so only the walls themselves are ever in memory together """
+        north, east = [np.empty((0, 2), dtype=np.uint32)], [np.empty((0, 2), dtype=np.uint32)]
+        for x0, y0, walls in self._wall_blocks():
+            # The north walls of the top row and the east walls of the right column are outer walls
+            north_cells = np.argwhere(walls[:, :self._height - 1 - y0] & NORTH).astype(np.uint32)
+            east_cells = np.argwhere(walls[:self._width - 1 - x0, :] & EAST).astype(np.uint32)
+            north.append(north_cells + np.array([x0, y0], dtype=np.uint32))
+            east.append(east_cells + np.array([x0, y0], dtype=np.uint32))
+        return np.concatenate(north), np.concatenate(east)
+
+    def add_wall_cells(self, north: np.ndarray, east: np.ndarray):
+        """ Adds the inner walls above and to the right of the cells in the layout inner_wall_cells gives them """
+        if self.tiled:
+            for x, y in north.tolist():
+                self.add_wall(x, y, 0)
+            for x, y in east.tolist():
+                self.add_wall(x, y, 1)
+            return
+        xs, ys = north[:, 0].astype(np.intp), north[:, 1].astype(np.intp)
+        self._walls[xs, ys] |= NORTH
+        self._walls[xs, ys + 1] |= SOUTH
+        xs, ys = east[:, 0].astype(np.intp), east[:, 1].astype(np.intp)
+        self._walls[xs, ys] |= EAST
+        self._walls[xs + 1, ys] |= WEST
+
+    def _invalidated_cells(self, goal, new_walls):
+        """ Finds the cells that lost every neighbor one step closer to the goal, working outwards in order of
+        distance so a cell is only judged once all of its possible parents are """
+        depth = self._flood_depth
+        all_walls = self._wall_view()
+        heap = []
+        for (x, y), direction in new_walls:
+            dx, dy = OFFSETS[direction]
+            a, b = (x, y), (x + dx, y + dy)
+            depth_a, depth_b = depth[a], depth[b]
+            if depth_a is not None and depth_b is not None:
+                if depth_a == depth_b + 1:
+                    heap.append((depth_a, a))
+                elif depth_b == depth_a + 1:
+                    heap.append((depth_b, b))
+        heapq.heapify(heap)
+
+        affected = set()
+        while heap:
+            fill_value, (x, y) = heapq.heappop(heap)
+            if (x, y) in affected or (x, y) == goal:
+                continue
+            walls = all_walls[x, y]
+            neighbors = [(x + dx, y + dy) for bit, (dx, dy) in zip(WALL_BITS, OFFSETS) if not walls & bit]
+            if any(depth[n_coord] == fill_value - 1 and n_coord not in affected for n_coord in neighbors):
+                continue
+            affected.add((x, y))
+            for n_coord in neighbors:
+                if depth[n_coord] == fill_value + 1 and n_coord not in affected:
+                    heapq.heappush(heap, (fill_value + 1, n_coord))
+        return affected
+
     def move(self, runner, goal, num):
-        x = get_x(runner)
-        y = get_y(runner)
+        """ Moves to the open neighbor with the lowest flood value. Ties go to the left, then the front and then the right
+        neighbor, so going straight wins over turning right. Without any known neighbor, the runner turns around """
+        x = runner.x
+        y = runner.y
         self.prev_runner = (x, y)
         self._visited_cells.add((x, y))
 
-        neighbors = self.get_open_neighbors(runner, goal, num)
+        walls = self._sense_and_update(runner, goal, num)
         flood_array = self._flood_array
-
-        tmp_dict = {cell: flood_array[cell] for cell in flood_array if cell in neighbors}
-
-        neighbors_with_cost = [(cell, tmp_dict[cell]) for cell in neighbors if cell in tmp_dict]
-
-
-        action = ""
-
-        try:
-            cheapest_node_data = min(neighbors_with_cost, key=lambda x: x[1])
-
-            orientations_dict = {(0, 1): "N", (1, 0): "E", (0, -1): "S", (-1, 0): "W"}
-            orientations = ["N", "E", "S", "W"]
-            current_orientation = get_orientation(runner)
-            coord_diff = (cheapest_node_data[0][0] - x, cheapest_node_data[0][1] - y)
-            target_orientation = orientations_dict[coord_diff]
-            diff = orientations.index(target_orientation) - orientations.index(current_orientation)
-            while diff != 0:
-                turn(runner, "Left")
-                action += "L"
-                current_orientation = get_orientation(runner)
-                diff = orientations.index(target_orientation) - orientations.index(current_orientation)
-
-        except ValueError:
-            turn(runner, "Left")
-            turn(runner, "Left")
-            action = "LL"
-        if "LLL" in action:
-            action = action.replace("LLL", "R")
-        action += "F"
+        sensed = SENSED[runner.orientation]
+
+        best = -1
+        best_cost = None
+        for i in range(3):
+            if walls[i]:
+                continue
+            dx, dy = STEPS[sensed[i]]
+            cost = flood_array.get((x + dx, y + dy))
+            if cost is not None and (best_cost is None or cost < best_cost):
+                best = i
+                best_cost = cost
+
+        if best < 0:
+            runner.orientation = LEFT[LEFT[runner.orientation]]
+            action = TURN_AROUND
+        else:
+            runner.orientation = sensed[best]
+            action = TURN_ACTIONS[best]
         self.go_straight(runner)
-
-        nx = get_x(runner)
-        ny = get_y(runner)
-        self._visited_cells.add((nx, ny))
+        self._visited_cells.add((runner.x, runner.y))
 
         return runner, action
 
-    def dijkstra(self, starting: tuple[int, int], goal: tuple[int, int]):
-        queue = []
-        dist = {}
-        prev = {}
+    def open_cells(self, x_coordinate: int, y_coordinate: int) -> list[tuple[int, int]]:
+        """ Returns the neighboring cells that are not blocked by a wall, in N, E, S, W order """
+        walls = int(self._walls[x_coordinate, y_coordinate])
+        return [(x_coordinate + dx, y_coordinate + dy) for bit, (dx, dy) in zip(WALL_BITS, OFFSETS) if not walls & bit]
 
-        coordinates = [(r, c) for r in range(self._width) for c in range(self._height)]
-
-        for coord in coordinates:
-            dist[coord] = float("inf")
-            prev[coord] = None
-            queue.append(coord)
-        dist[starting] = 0
-
-        temp_run_num = 0
+    @timed("dijkstra")
+    def dijkstra(self, starting: tuple[int, int], goal: tuple[int, int], cells: set[tuple[int, int]] | None = None):
+        """ Every step costs the same, so Dijkstra's reduces to a breadth-first search that stops at the goal's layer.
+        The path prefers the smallest coordinates among equally short predecessors, as the old list-based queue did.
+        If cells are given, the search never leaves them """
+        all_walls = self._wall_view()
+        dist = {starting: 0}
+        frontier = [starting]
 
         with alive_bar(None, title="Dijkstra's", calibrate=100000) as bar:
-            while queue:
-                u = min(queue, key=lambda node: dist[node])
-                queue.remove(u)
-
-                temp_runner = create_runner(u[0], u[1])
-                temp_run_num += 1
-                neighbors = self.free_nodes(temp_runner)
-                turn(temp_runner, "Left")
-                free_nodes = self.free_nodes(temp_runner)
-                neighbors.extend([node for node in free_nodes if node not in neighbors])
-                for v in neighbors:
-                    alt = dist[u] + 1
-                    if alt < dist[v]:  # Only update if the new path is shorter
-                        dist[v] = alt
-                        prev[v] = u
-                bar()
+            while frontier and goal not in dist:
+                next_frontier = []
+                for x, y in frontier:
+                    fill_value = dist[(x, y)] + 1
+                    walls = all_walls[x, y]
+                    for bit, (dx, dy) in zip(WALL_BITS, OFFSETS):
+                        n_coord = (x + dx, y + dy)
+                        if not walls & bit and n_coord not in dist and (cells is None or n_coord in cells):
+                            dist[n_coord] = fill_value
+                            next_frontier.append(n_coord)
+                bar(len(frontier))
+                frontier = next_frontier
 
         path = []
-        goal_prev_pair = []
-        if prev[goal] is not None or goal == starting:
+        if goal in dist:
             u = goal
-            while prev[u] is not None:
+            while u != starting:
                 path.append(u)
-                if [u, prev[u]] in goal_prev_pair:
-                    break
-                else:
-                    goal_prev_pair.append([u, prev[u]])
-                u = prev[u]
+                u = min(n_coord for n_coord in self.open_cells(u[0], u[1]) if dist.get(n_coord) == dist[u] - 1)
 
         path = path[::-1]
         self._path = path
 
+    def _euclidian_distances(self, goal) -> np.ndarray:
+        xs, ys = np.indices((self.width, self.height), dtype=np.float64)
+        return np.sqrt((goal[0] - xs) ** 2 + (goal[1] - ys) ** 2)
+
     def euclidian_calc(self, goal):
-        for x in range(self.width):
-            for y in range(self.height):
-                self.heuristic[(x, y)] = sqrt((goal[0] - x)**2 + (goal[1] - y)**2)
+        self.heuristic = self._euclidian_distances(goal)
 
-    def hope_mode(self, goal):
+    def hope_mode(self, goal, seed: int | None = None):
+        """ Adds a random term to the euclidian distances whose range shrinks by the decay rate from one cell to the
+        next, going through the columns of x one after another """
         print("modified_heuristic_with_decay running")
         decay = self.render_settings[6]
         factor = self.render_settings[7]
+        rng = np.random.default_rng(seed)
 
-        for x in range(self.width):
-            for y in range(self.height):
-                h = sqrt((goal[0] - x)**2 + (goal[1] - y)**2)
-                exploration_term = 2 * random.uniform(-factor, factor)
-                self.heuristic[(x, y)] = h + exploration_term
-                factor *= decay
+        factors = factor * decay ** np.arange(self.width * self.height, dtype=np.float64)
+        exploration_term = 2 * rng.uniform(-1, 1, self.width * self.height) * factors
+        self.heuristic = self._euclidian_distances(goal) + exploration_term.reshape(self.width, self.height)
 
+    @timed("exploration")
     def explore(self, starting: tuple[int, int] = (0, 0), goal: tuple[int, int] = (0, 0)):
         print("Exploration running")
-        runner = create_runner(starting[0], starting[1])
-        num = 0
-        data = [["Step", "x-coordinate", "y-coordinate", "Actions"]]
-        rate = []
-        with alive_bar(None, title="Exploration", calibrate=100000) as bar:
-            while (get_x(runner), get_y(runner)) != goal:
-                runner, action = self.move(runner, goal, num)
-                num += 1
-                data.append([num, self.prev_runner[0], self.prev_runner[1], action])
-                bar()
-                if self.height*self.width >= 250000:
-                    gc.collect()
-                rate.append(float(bar.rate.replace("?", "0").replace("/s", "")))
-        # print("RATE", rate)
-        # print("DATA", data)
-
-        self.exploration_data = data
+        resume, self._resume = self._resume, None
+        if resume is None:
+            runner = create_runner(starting[0], starting[1])
+            num = 0
+            data = [HEADER_ROW]
+            position = None
+        else:
+            runner = Runner(*resume["runner"])
+            num = resume["steps"]
+            data = resume["rows"]
+            position = resume["log_position"]
+        log = open_log(self.run_id, self.log_format, starting, position) if self.log_format is not None else None
+
+        checkpoint_file = os.path.join(self.run_id, CHECKPOINT_FILE)
+        checkpoints = self.checkpoint_steps is not None or self.checkpoint_seconds is not None
+        checkpoint_steps = self.checkpoint_steps or 0
+        checkpoint_seconds = self.checkpoint_seconds if self.checkpoint_seconds is not None else float("inf")
+        next_checkpoint = time.monotonic() + checkpoint_seconds
+        try:
+            with alive_bar(None, title="Exploration", calibrate=100000) as bar:
+                while (runner.x, runner.y) != goal:
+                    runner, action = self.move(runner, goal, num)
+                    num += 1
+                    if log is None:
+                        data.append([num, self.prev_runner[0], self.prev_runner[1], action])
+                    else:
+                        log.write(num, self.prev_runner[0], self.prev_runner[1], action)
+                    bar()
+                    if checkpoints and ((checkpoint_steps and num % checkpoint_steps == 0)
+                                        or time.monotonic() >= next_checkpoint):
+                        self._write_checkpoint(checkpoint_file, starting, goal, runner, num, data, log)
+                        next_checkpoint = time.monotonic() + checkpoint_seconds
+        finally:
+            if log is not None:
+                log.close()
+
+        # The finished exploration is in the log, so there is nothing left to resume
+        if checkpoints and os.path.exists(checkpoint_file):
+            os.remove(checkpoint_file)
+        self.exploration_data = data if log is None else []
+        self.steps = num
+        metrics.count("steps", num)
 
         return num
 
+    @timed("checkpoint")
+    def _write_checkpoint(self, checkpoint_file: str, starting, goal, runner: Runner, num: int, data: list, log):
+        """ Writes everything the exploration needs to continue after step num. The rows only have to be written when
+        they are kept in memory instead of a log. The mind maze's walls and the visited cells are written as cell
+        coordinates, so a checkpoint of a huge maze takes memory for what the runner found and not for the maze """
+        north, east = self._mind_maze.inner_wall_cells()
+        visited = np.fromiter(itertools.chain.from_iterable(self._visited_cells), dtype=np.uint32,
+                              count=2 * len(self._visited_cells)).reshape(-1, 2)
+        rows = None
+        if log is None:
+            codes = {action: code for code, action in enumerate(ACTIONS)}
+            rows = ([row[1] for row in data[1:]], [row[2] for row in data[1:]], [codes[row[3]] for row in data[1:]])
+        os.makedirs(self.run_id, exist_ok=True)
+        write_checkpoint(checkpoint_file, {
+            "width": self._width, "height": self._height, "starting": starting, "goal": goal, "steps": num,
+            "runner": (runner.x, runner.y, runner.orientation), "planner": self.planner, "log_format": self.log_format,
+            "log_position": log.position() if log is not None else (0, None, 0), "north": north, "east": east,
+            "visited": visited, "route": self._mind_maze._route, "rows": rows})
+        metrics.count("checkpoints")
+
+    def resume(self, checkpoint_file: str) -> tuple[tuple[int, int], tuple[int, int]]:
+        """ Loads an exploration's checkpoint, from which the next explore or shortest_path continues with the same
+        step numbers and the same moves. Returns the starting cell and goal of the run """
+        state = read_checkpoint(checkpoint_file)
+        if (state["width"], state["height"]) != (self._width, self._height):
+            raise ValueError(f"{checkpoint_file} belongs to a {state['width']}x{state['height']} maze, not a "
+                             f"{self._width}x{self._height} one.")
+        mind_maze = self.blank_copy()
+        mind_maze.add_wall_cells(state["north"], state["east"])
+        # The first step after resuming builds the euclidian or hope heuristic from these, as the run's first step did
+        mind_maze.render_settings = self.render_settings
+        if state["route"] is not None:
+            mind_maze._route = [tuple(cell) for cell in state["route"]]
+            mind_maze.flood_array = {cell: fill_value for fill_value, cell in enumerate(mind_maze._route)}
+        self._mind_maze = mind_maze
+        self._visited_cells = set(map(tuple, state["visited"].tolist()))
+        self.planner = state["planner"]
+        self.log_format = state["log_format"]
+        self.steps = state["steps"]
+
+        data = [HEADER_ROW]
+        if state["rows"] is not None:
+            xs, ys, codes = (column.tolist() for column in state["rows"])
+            data += [[num, x, y, ACTIONS[code]] for num, (x, y, code) in enumerate(zip(xs, ys, codes), 1)]
+        self._resume = {"runner": state["runner"], "steps": state["steps"], "log_position": state["log_position"],
+                        "rows": data}
+        return state["starting"], state["goal"]
+
     def shortest_path(self, starting: list[int, int] = [0, 0], goal: list[int, int] = [0, 0]):
         goal = (goal[0], goal[1])
         starting = (starting[0], starting[1])
@@ -313,31 +683,28 @@ class Maze:
 
         maze = self._mind_maze
         maze.render_settings = self.render_settings
-        width = maze.width
-        height = maze.height
-        rows = range(width)
-        columns = range(height)
-        all_cells = [(r, c) for r in rows for c in columns]
-        unvisited_cells = set()
-        for cell in all_cells:
-            if cell not in self._visited_cells:
-                unvisited_cells.add(cell)
-                maze.add_vertical_wall(cell[1], cell[0])
-                maze.add_horizontal_wall(cell[0], cell[1])
-                maze.add_vertical_wall(cell[1], cell[0] + 1)
-                maze.add_horizontal_wall(cell[0], cell[1] + 1)
-        if self.render_settings[0] or self.render_settings[1]:
+        if self.render_settings[0] or self.render_settings[1] or self.render_settings[10]:
             maze.render(create_runner(starting[0], starting[1]), goal, 100000, list(self._visited_cells))
-        maze.dijkstra(starting, goal)
-        if self.render_settings[0] or self.render_settings[1]:
+        self.known_path(starting, goal)
+        if self.render_settings[0] or self.render_settings[1] or self.render_settings[10]:
             maze.render(create_runner(starting[0], starting[1]), goal, 100001, list(maze.path))
             self.render(create_runner(starting[0], starting[1]), goal, 100002, list(maze.path))
+            maze.close_view()
+            self.close_view()
+            close_video(self.run_id)
         print("Exploration steps:", num, "    Final path length:", len(maze.path) + 1,
               "    score:", num / 4 + (len(maze.path) + 1),
               "    Final data file path:", self.run_id)
         self.final_path = [starting] + maze.path
         return self.exploration_data, self.final_path, num, len(maze.path) + 1, num / 4 + (len(maze.path) + 1)
 
+    def known_path(self, starting: tuple[int, int], goal: tuple[int, int]) -> list[tuple[int, int]]:
+        """ The shortest path after an exploration, without the starting cell. It may only use cells the runner has
+        been in, as the walls of all others are unknown """
+        self._mind_maze.dijkstra(starting, goal, self._visited_cells)
+        return self._mind_maze.path
+
+    @timed("file_writing")
     def build_files(self, file_name):
         exploration_data = self.exploration_data
         final_path = self.final_path
@@ -347,85 +714,63 @@ class Maze:
         except FileExistsError:
             pass
 
-        with open(f"{self.run_id}\exploration.csv", "w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerows(exploration_data)
+        # A streamed exploration was already written during the run
+        if self.log_format is None:
+            with open(f"{self.run_id}\exploration.csv", "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerows(exploration_data)
 
         with open(f"{self.run_id}\statistics.txt", "w") as file:
             file.write(file_name + "\n")
-            file.write(str((len(exploration_data) - 1) / 4 + (len(final_path))) + "\n")
-            file.write(str(len(exploration_data) - 1) + "\n")
+            file.write(str(self.steps / 4 + (len(final_path))) + "\n")
+            file.write(str(self.steps) + "\n")
             file.write(str(final_path).replace("[", "").replace("]", "") + "\n")
             file.write(str(len(final_path)))
 
 
-    def render(self, runner: dict[str, any], goal: tuple[int, int], num: int, final_path: list = []):
-        """ Renders the maze using matplotlib """
+    @timed("render")
+    def render(self, runner: Runner, goal: tuple[int, int], num: int, final_path: list = []):
+        """ Renders the maze using matplotlib, or straight into an image array with the raster renderer """
+        metrics.count("frames_rendered")
+        if self.render_settings[12] == "raster":
+            if self._raster_view is None:
+                self._raster_view = RasterView(self, self.render_settings[13])
+            self._raster_view.update(runner, goal, num, final_path)
+            return
+        if self.render_settings[9]:
+            if self._live_view is None:
+                self._live_view = LiveView(self)
+            self._live_view.update(runner, goal, num, final_path)
+            return
+
         plt.figure(figsize=(10, 10))
         ax = plt.gca()
-        colored_boxes = []
-
-        for step in final_path:
-            colored_boxes.append([step[0], step[1], "pink"])
-
-        # Draw horizontal walls
-        for x, y in self._h_walls:
-            plt.plot([x, x + 1], [y, y], color="red", linewidth=2)
-
-        # Draw vertical walls
-        for x, y in self._v_walls:
-            plt.plot([x, x], [y, y + 1], color="green", linewidth=2)
 
-        colored_boxes.append([goal[0], goal[1], "yellow"])
-        colored_boxes.append([get_x(runner), get_y(runner), "blue"])
+        # Draw all horizontal and all vertical walls as one collection each
+        h_segments, v_segments = wall_segments(self)
+        ax.add_collection(LineCollection(h_segments, colors="red", linewidths=2, capstyle="projecting"))
+        ax.add_collection(LineCollection(v_segments, colors="green", linewidths=2, capstyle="projecting"))
 
-        for x, y, color in colored_boxes:
-            rect = patches.Rectangle((x, y), 1, 1, linewidth=0, facecolor=color)
-            ax.add_patch(rect)
+        verts, colors = colored_cells(runner, goal, final_path)
+        ax.add_collection(PolyCollection(verts, facecolors=colors, linewidths=0))
 
         if self.render_settings[3]:
             cell_values = self._flood_array
-            if cell_values:
-                for (x, y), value in cell_values.items():
-                    # Center the text in the cell
-                    plt.text(x + 0.5, y + 0.5, "{:.1f}".format(value), ha='center', va='center', fontsize=10, color='black')
+            if cell_values is not None:
+                # Above this size the numbers would overlap each other, so only the heatmap is drawn
+                if max(self._width, self._height) <= FLOOD_TEXT_LIMIT:
+                    for (x, y), value in cell_values.items():
+                        # Center the text in the cell
+                        plt.text(x + 0.5, y + 0.5, "{:.1f}".format(value), ha='center', va='center', fontsize=10, color='black')
                 if self.render_settings[8]:
-                        heatmap = [[cell_values.get((x, y), float('inf')) for x in range(self._width)] for y in
-                                   range(self._height)]
-                        plt.imshow(heatmap, cmap='coolwarm', interpolation='nearest', origin='lower',
-                                   extent=[0, self._width, 0, self._height])
-
-        direction = get_orientation(runner)
-        dx, dy = 0, 0
-        if direction == "N":
-            dy = 0.3
-        elif direction == "S":
-            dy = -0.3
-        elif direction == "E":
-            dx = 0.3
-        elif direction == "W":
-            dx = -0.3
+                    plt.imshow(flood_heatmap(cell_values, self._width, self._height), cmap='coolwarm',
+                               interpolation='nearest', origin='lower', extent=[0, self._width, 0, self._height])
+
+        dx, dy = ARROW_OFFSETS[get_orientation(runner)]
         ax.arrow(get_x(runner) + 0.5, get_y(runner) + 0.5, dx, dy, head_width=0.2, head_length=0.2, fc='yellow',
                  ec='blue')
 
-        ax.set_xticks([])
-        ax.set_yticks([])
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['bottom'].set_visible(False)
-        ax.spines['left'].set_visible(False)
-
-        # Add custom axes showing x and y values
-        for x in range(self._width):
-            plt.text(x + 0.5, -0.5, str(x), ha='center', va='center', fontsize=10, color='black')  # x-axis values
-        for y in range(self._height):
-            plt.text(-0.5, y + 0.5, str(y), ha='center', va='center', fontsize=10, color='black')  # y-axis values
-
-        # Set grid and labels
-        plt.xlim(0, self._width)
-        plt.ylim(0, self._height)
-        plt.gca().set_aspect('equal', adjustable='box')
-        plt.grid(visible=True, which='both', color='lightgray', linestyle='--', linewidth=0.5)#
+        setup_axes(ax, self._width, self._height)
         if self.render_settings[0]:
             try:
                 os.mkdir(self.run_id)
@@ -433,32 +778,35 @@ class Maze:
                 pass
             plt.savefig(f'./{self.run_id}/{num}.png')
 
+        if self.render_settings[10]:
+            canvas = plt.gcf().canvas
+            canvas.draw()
+            write_video_frame(self.run_id, np.asarray(canvas.buffer_rgba()), self.render_settings[11])
+
         if self.render_settings[1]:
             plt.show(block=False)
             plt.pause(self.render_settings[2])
         plt.close()
 
-    def free_nodes(self, runner: dict[str, any]) -> list[tuple[int, int]]:
-        walls = [not value for value in self.sense_walls(runner)]
-        free_nodes = []
-        if walls[0]:
-            new_runner = runner.copy()
-            turn(new_runner, "Left")
-            forward(new_runner)
-            free_nodes.append((get_x(new_runner), get_y(new_runner)))
-        if walls[1]:
-            new_runner = runner.copy()
-            forward(new_runner)
-            free_nodes.append((get_x(new_runner), get_y(new_runner)))
-        if walls[2]:
-            new_runner = runner.copy()
-            turn(new_runner, "Right")
-            forward(new_runner)
-            free_nodes.append((get_x(new_runner), get_y(new_runner)))
-        return free_nodes
-
-
-def update_maze(runner, walls, goal, num, render_settings, run_id, maze: Maze = None, width=None, height=None):
+    def close_view(self):
+        """ Closes the live view or raster view, if one was opened """
+        if self._live_view is not None:
+            self._live_view.close()
+            self._live_view = None
+        if self._raster_view is not None:
+            self._raster_view.close()
+            self._raster_view = None
+
+    def free_nodes(self, runner: Runner) -> list[tuple[int, int]]:
+        """ The cells to the left of, in front of and to the right of the runner that are not blocked by a wall """
+        x = runner.x
+        y = runner.y
+        return [(x + STEPS[direction][0], y + STEPS[direction][1])
+                for sensed, direction in zip(self.sense_walls(runner), SENSED[runner.orientation]) if not sensed]
+
+
+def update_maze(runner, walls, goal, num, render_settings, run_id, maze: Maze = None, width=None, height=None,
+                planner="floodfill", seed=None):
     if maze is None and width is None and height is None:
         maze = Maze()
     elif maze is None and height is None:
@@ -466,112 +814,33 @@ def update_maze(runner, walls, goal, num, render_settings, run_id, maze: Maze =
     elif maze is None:
         maze = Maze(width, height)
 
-    if maze.heuristic == {}:
+    if maze.heuristic is None:
         if maze.render_settings[4]:
             maze.euclidian_calc(goal)
         elif maze.render_settings[5]:
-            maze.hope_mode(goal)
-
-    x = get_x(runner)
-    y = get_y(runner)
-    orientation = get_orientation(runner)
-
-    if orientation == "N":
-        if walls[0]:
-            maze.add_vertical_wall(y, x)
-            maze.all_walls[(x, y)][3] = True
-            try:
-                maze.all_walls[(x - 1, y)][1] = True
-            except KeyError:
-                pass
-        if walls[1]:
-            maze.add_horizontal_wall(x, y + 1)
-            maze.all_walls[(x, y)][0] = True
-            try:
-                maze.all_walls[(x, y + 1)][2] = True
-            except KeyError:
-                pass
-        if walls[2]:
-            maze.add_vertical_wall(y, x + 1)
-            maze.all_walls[(x, y)][1] = True
-            try:
-                maze.all_walls[(x + 1, y)][3] = True
-            except KeyError:
-                pass
-    if orientation == "S":
-        if walls[0]:
-            maze.add_vertical_wall(y, x + 1)
-            maze.all_walls[(x, y)][1] = True
-            try:
-                maze.all_walls[(x + 1, y)][3] = True
-            except KeyError:
-                pass
-        if walls[1]:
-            maze.add_horizontal_wall(x, y)
-            maze.all_walls[(x, y)][2] = True
-            try:
-                maze.all_walls[(x, y - 1)][0] = True
-            except KeyError:
-                pass
-        if walls[2]:
-            maze.add_vertical_wall(y, x)
-            maze.all_walls[(x, y)][3] = True
-            try:
-                maze.all_walls[(x - 1, y)][1] = True
-            except KeyError:
-                pass
-
-    if orientation == "E":
-        if walls[0]:
-            maze.add_horizontal_wall(x, y + 1)
-            maze.all_walls[(x, y)][0] = True
-            try:
-                maze.all_walls[(x, y + 1)][2] = True
-            except KeyError:
-                pass
-        if walls[1]:
-            maze.add_vertical_wall(y, x + 1)
-            maze.all_walls[(x, y)][1] = True
-            try:
-                maze.all_walls[(x + 1, y)][3] = True
-            except KeyError:
-                pass
-        if walls[2]:
-            maze.add_horizontal_wall(x, y)
-            maze.all_walls[(x, y)][2] = True
-            try:
-                maze.all_walls[(x, y - 1)][0] = True
-            except KeyError:
-                pass
-
-    if orientation == "W":
-        if walls[0]:
-            maze.add_horizontal_wall(x, y)
-            maze.all_walls[(x, y)][2] = True
-            try:
-                maze.all_walls[(x, y - 1)][0] = True
-            except KeyError:
-                pass
-        if walls[1]:
-            maze.add_vertical_wall(y, x)
-            maze.all_walls[(x, y)][3] = True
-            try:
-                maze.all_walls[(x - 1, y)][1] = True
-            except KeyError:
-                pass
-        if walls[2]:
-            maze.add_horizontal_wall(x, y + 1)
-            maze.all_walls[(x, y)][0] = True
-            try:
-                maze.all_walls[(x, y + 1)][2] = True
-            except KeyError:
-                pass
-
-    flood_array = maze.flood_fill(goal)
+            maze.hope_mode(goal, seed)
+
+    x = runner.x
+    y = runner.y
+
+    new_walls = []
+    for sensed, direction in zip(walls, SENSED[runner.orientation]):
+        if sensed and maze.add_wall(x, y, direction):
+            new_walls.append(((x, y), direction))
+    metrics.count("walls_discovered", len(new_walls))
+
+    maze.planner = planner
+    if planner == "incremental":
+        flood_array = maze.incremental_flood_fill(goal, new_walls)
+    elif planner == "astar":
+        # On the first step the runner has not sensed the side behind it, so the route may not lead through it
+        flood_array = maze.astar((x, y), goal, WALL_BITS[LEFT[LEFT[runner.orientation]]] if num == 0 else 0)
+    else:
+        flood_array = maze.flood_fill(goal)
     maze.flood_array = flood_array
     maze.render_settings = render_settings
     maze.run_id = run_id
-    if render_settings[0] or render_settings[1]:
+    if render_settings[0] or render_settings[1] or render_settings[10]:
         maze.render(runner, goal, num)
 
     return maze, flood_array
\ No newline at end of file
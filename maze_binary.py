@@ -0,0 +1,107 @@
+import argparse
+import hashlib
+import os
+import struct
+
+import numpy as np
+
+from maze import Maze
+
+# Magic bytes, format version, width and height, followed by the packed horizontal and then vertical inner wall bits
+MAGIC = b"MZB\0"
+VERSION = 1
+HEADER = struct.Struct("<4sHII")
+CACHE_DIR = ".maze_cache"
+
+
+def write_binary(maze: Maze, binary_file: str):
+    horizontal, vertical = maze.inner_walls()
+    # A file of its own per process, as batch workers may cache the same maze at the same time
+    tmp_file = f"{binary_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, maze.width, maze.height))
+        file.write(np.packbits(horizontal, axis=None).tobytes())
+        file.write(np.packbits(vertical, axis=None).tobytes())
+    os.replace(tmp_file, binary_file)
+
+
+def read_binary(binary_file: str) -> Maze:
+    data = np.fromfile(binary_file, dtype=np.uint8)
+    if data.size < HEADER.size:
+        raise ValueError(f"{binary_file} is too short to be a binary maze file.")
+    magic, version, width, height = HEADER.unpack(data[:HEADER.size].tobytes())
+    if magic != MAGIC:
+        raise ValueError(f"{binary_file} is not a binary maze file.")
+    if version != VERSION:
+        raise ValueError(f"{binary_file} uses version {version} of the binary maze format, expected {VERSION}.")
+
+    h_count = width * max(height - 1, 0)
+    v_count = max(width - 1, 0) * height
+    h_bytes = -(-h_count // 8)
+    v_bytes = -(-v_count // 8)
+    if data.size != HEADER.size + h_bytes + v_bytes:
+        raise ValueError(f"{binary_file} does not hold the walls of a {width}x{height} maze.")
+
+    bits = data[HEADER.size:]
+    horizontal = np.unpackbits(bits[:h_bytes], count=h_count).reshape(width, max(height - 1, 0))
+    vertical = np.unpackbits(bits[h_bytes:], count=v_count).reshape(max(width - 1, 0), height)
+    maze = Maze(width=width, height=height)
+    maze.add_walls(horizontal.astype(bool), vertical.astype(bool))
+    return maze
+
+
+def binary_bands(binary_file: str, band: int):
+    """ The size of a binary maze and a generator of its walls a band of columns at a time, as the first column, the
+    horizontal walls of the band's columns and the vertical walls to the right of them. The file is memory-mapped, so
+    only one band is ever unpacked """
+    header = np.fromfile(binary_file, dtype=np.uint8, count=HEADER.size)
+    magic, version, width, height = HEADER.unpack(header.tobytes())
+    if magic != MAGIC:
+        raise ValueError(f"{binary_file} is not a binary maze file.")
+    if version != VERSION:
+        raise ValueError(f"{binary_file} uses version {version} of the binary maze format, expected {VERSION}.")
+    h_row, v_row = max(height - 1, 0), height
+    h_bytes = -(-width * h_row // 8)
+    bits = np.memmap(binary_file, dtype=np.uint8, mode="r", offset=HEADER.size)
+
+    def rows(packed: np.ndarray, row_length: int, start: int, stop: int) -> np.ndarray:
+        first, last = start * row_length, stop * row_length
+        unpacked = np.unpackbits(packed[first // 8:-(-last // 8)])
+        return unpacked[first % 8:first % 8 + last - first].reshape(stop - start, row_length).astype(bool)
+
+    def bands():
+        for x0 in range(0, width, band):
+            x1 = min(x0 + band, width)
+            yield (x0, rows(bits[:h_bytes], h_row, x0, x1),
+                   rows(bits[h_bytes:], v_row, min(x0, width - 1), min(x1, width - 1)))
+
+    return width, height, bands()
+
+
+def file_digest(maze_file: str) -> str:
+    """ The SHA-256 of the file's content, so a renamed or copied maze still hits the cache """
+    digest = hashlib.sha256()
+    with open(maze_file, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path(maze_file: str, cache_dir: str = CACHE_DIR) -> str:
+    return os.path.join(cache_dir, file_digest(maze_file) + ".mzb")
+
+
+if __name__ == "__main__":
+    from maze_runner import maze_reader
+
+    parser = argparse.ArgumentParser(description="ECS Maze Runner Binary Converter")
+
+    parser.add_argument("maze", help='The name of the text maze file, e.g., maze1.mz')
+    parser.add_argument("output", help='The name of the binary maze file, defaults to the maze name with .mzb',
+                        nargs="?", default=None)
+
+    args = parser.parse_args()
+
+    output = args.output if args.output is not None else os.path.splitext(args.maze)[0] + ".mzb"
+    write_binary(maze_reader(args.maze), output)
+    print(f"Binary maze saved as {output}")
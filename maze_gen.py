@@ -0,0 +1,210 @@
+import argparse
+import random
+
+import numpy as np
+
+from maze import Maze
+
+ALGORITHMS = ("backtracker", "kruskal")
+
+
+def backtracker(width: int, height: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """ Carves a seeded perfect maze with the recursive backtracker, which makes long winding corridors. The walk
+    itself is a Python loop over every cell, so it takes a few seconds per million cells """
+    rng = random.Random(seed)
+    horizontal = np.ones((width, max(height - 1, 0)), dtype=bool)
+    vertical = np.ones((max(width - 1, 0), height), dtype=bool)
+    if width == 0 or height == 0:
+        return horizontal, vertical
+    # Cell (x, y) is x * height + y, in flat views of the arrays
+    visited = bytearray(width * height)
+    h_flat = horizontal.reshape(-1)
+    v_flat = vertical.reshape(-1)
+    choice = rng.choice
+    visited[0] = 1
+    stack = [(0, 0)]
+    while stack:
+        x, y = stack[-1]
+        cell = x * height + y
+        # In N, E, S, W order
+        options = []
+        if y + 1 < height and not visited[cell + 1]:
+            options.append((x, y + 1))
+        if x + 1 < width and not visited[cell + height]:
+            options.append((x + 1, y))
+        if y > 0 and not visited[cell - 1]:
+            options.append((x, y - 1))
+        if x > 0 and not visited[cell - height]:
+            options.append((x - 1, y))
+        if not options:
+            stack.pop()
+            continue
+        nx, ny = choice(options)
+        if nx == x:
+            h_flat[x * (height - 1) + min(y, ny)] = False
+        else:
+            v_flat[min(x, nx) * height + y] = False
+        visited[nx * height + ny] = 1
+        stack.append((nx, ny))
+    return horizontal, vertical
+
+
+def kruskal(width: int, height: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """ Carves a seeded perfect maze that is the spanning tree randomized Kruskal's algorithm finds, which makes many
+    short dead ends. It is worked out with Boruvka's algorithm on whole arrays, where each round joins every part of
+    the maze to its neighbor across the first of its walls in the random order, so it needs a few dozen NumPy passes
+    instead of a loop over the cells """
+    rng = np.random.default_rng(seed)
+    horizontal = np.ones((width, max(height - 1, 0)), dtype=bool)
+    vertical = np.ones((max(width - 1, 0), height), dtype=bool)
+    cells = width * height
+    if cells == 0:
+        return horizontal, vertical
+
+    # The walls as edges between the flat cells x * height + y on both sides, vertical walls first. Each edge's weight
+    # holds a random key above its own index, so no two are equal and the index of the lightest one is its low bits.
+    # The edges stay in this order, so the cells they join are read from memory one after another
+    vertical_count = vertical.size
+    edge_count = vertical_count + horizontal.size
+    index_type = np.int32 if max(cells, edge_count) < 2 ** 31 else np.int64
+    index_bits = edge_count.bit_length()
+    weight = rng.integers(0, 2 ** (64 - index_bits), edge_count, dtype=np.uint64) << np.uint64(index_bits)
+    weight |= np.arange(edge_count, dtype=np.uint64)
+    cell = np.arange(cells, dtype=index_type).reshape(width, height)
+    first = np.concatenate([cell[:-1].reshape(-1), cell[:, :-1].reshape(-1)])
+    second = np.concatenate([cell[1:].reshape(-1), cell[:, 1:].reshape(-1)])
+    del cell
+
+    component = np.arange(cells, dtype=index_type)
+    removed = np.zeros(edge_count, dtype=bool)
+    no_edge = np.iinfo(np.uint64).max
+    # In the first round every cell is a part of its own, so the first of its walls is the lightest of its four sides
+    best = np.full((width, height), no_edge, dtype=np.uint64)
+    east = weight[:vertical_count].reshape(width - 1, height)
+    north = weight[vertical_count:].reshape(width, height - 1)
+    np.minimum(best[:-1], east, out=best[:-1])
+    np.minimum(best[1:], east, out=best[1:])
+    np.minimum(best[:, :-1], north, out=best[:, :-1])
+    np.minimum(best[:, 1:], north, out=best[:, 1:])
+    best = best.reshape(-1)
+    while True:
+        parts = np.flatnonzero(best != no_edge).astype(index_type)
+        if not parts.size:
+            break
+        chosen = (best[parts] & np.uint64(2 ** index_bits - 1)).astype(np.int64)
+        removed[chosen] = True
+        chosen_vertical = chosen < vertical_count
+        edge = np.where(chosen_vertical, chosen, chosen - vertical_count)
+        chosen_first = np.where(chosen_vertical, edge, edge // max(height - 1, 1) * height + edge % max(height - 1, 1))
+        chosen_second = chosen_first + np.where(chosen_vertical, height, 1).astype(index_type)
+        neighbor = np.where(component[chosen_first] == parts, component[chosen_second], component[chosen_first])
+
+        # Every part points at the neighbor it joins. Two parts that chose the same wall point at each other, the
+        # lower one of them becomes the root of the joined part
+        parent = np.arange(cells, dtype=index_type)
+        parent[parts] = neighbor
+        root = parts[(parent[neighbor] == parts) & (parts < neighbor)]
+        parent[root] = root
+        targets = parent[parts]
+        while True:
+            jumped = parent[targets]
+            if np.array_equal(jumped, targets):
+                break
+            targets = jumped
+        parent[parts] = targets
+        component = parent[component]
+
+        # Only the walls between two parts are left for the next round, in which each part takes the first of them
+        first_component, second_component = component[first], component[second]
+        between = first_component != second_component
+        weight, first, second = weight[between], first[between], second[between]
+        best.fill(no_edge)
+        np.minimum.at(best, first_component[between], weight)
+        np.minimum.at(best, second_component[between], weight)
+
+    opened = np.flatnonzero(removed)
+    vertical.reshape(-1)[opened[opened < vertical_count]] = False
+    horizontal.reshape(-1)[opened[opened >= vertical_count] - vertical_count] = False
+    return horizontal, vertical
+
+
+def add_loops(horizontal: np.ndarray, vertical: np.ndarray, loops: float, seed: int = 0):
+    """ Knocks down the given share of the remaining inner walls, which turns a perfect maze into one with loops """
+    rng = np.random.default_rng(seed)
+    horizontal &= rng.random(horizontal.shape) >= loops
+    vertical &= rng.random(vertical.shape) >= loops
+
+
+def generate_walls(width: int, height: int, seed: int = 0, loops: float = 0.,
+                   algorithm: str = "backtracker") -> tuple[np.ndarray, np.ndarray]:
+    """ Carves a seeded perfect maze with the given algorithm and then knocks down the given share of the remaining
+    inner walls. Returns the walls in the layout Maze.add_walls takes them """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown maze algorithm '{algorithm}', expected one of {', '.join(ALGORITHMS)}.")
+    horizontal, vertical = backtracker(width, height, seed) if algorithm == "backtracker" else kruskal(width, height,
+                                                                                                         seed)
+    if loops:
+        add_loops(horizontal, vertical, loops, seed)
+    return horizontal, vertical
+
+
+def generate_maze(width: int, height: int, seed: int = 0, loops: float = 0., algorithm: str = "backtracker") -> Maze:
+    maze = Maze(width, height)
+    maze.add_walls(*generate_walls(width, height, seed, loops, algorithm))
+    return maze
+
+
+def write_maze_file(horizontal: np.ndarray, vertical: np.ndarray, maze_file: str):
+    """ Writes the walls in the text format maze_reader reads, the first line being the top of the maze """
+    width, height = horizontal.shape[0], vertical.shape[1]
+    grid = np.full((2 * height + 1, 2 * width + 1), ord("#"), dtype=np.uint8)
+    grid[1::2, 1::2] = ord(".")
+    grid[-3:0:-2, 1::2] = np.where(horizontal.T, ord("#"), ord("."))
+    grid[-2::-2, 2:-2:2] = np.where(vertical.T, ord("#"), ord("."))
+    lines = np.hstack([grid, np.full((grid.shape[0], 1), ord("\n"), dtype=np.uint8)])
+    with open(maze_file, "wb") as file:
+        file.write(lines.tobytes())
+
+
+def write_walls(horizontal: np.ndarray, vertical: np.ndarray, output_file: str):
+    """ Writes the walls as a text maze, or as a binary or tiled maze if the file ends with .mzb or .mzt """
+    if output_file.endswith(".mzb"):
+        from maze_binary import write_binary
+
+        maze = Maze(horizontal.shape[0], vertical.shape[1])
+        maze.add_walls(horizontal, vertical)
+        write_binary(maze, output_file)
+    elif output_file.endswith(".mzt"):
+        from tiled_walls import TiledWalls
+
+        walls = TiledWalls.create(output_file, horizontal.shape[0], vertical.shape[1])
+        walls.add_walls(horizontal, vertical)
+        walls.close()
+    else:
+        write_maze_file(horizontal, vertical, output_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ECS Maze Runner Maze Generator")
+
+    parser.add_argument("width", help='The number of columns of the maze.', type=int)
+    parser.add_argument("height", help='The number of rows of the maze.', type=int)
+    parser.add_argument("output", help='The maze file to write, a text maze unless it ends with .mzb (binary) or .mzt '
+                                       '(tiled), e.g., maze_4000.mz')
+    parser.add_argument("--algorithm", help="'backtracker' makes long winding corridors, 'kruskal' many short dead "
+                                            "ends and is much faster on large mazes.", choices=ALGORITHMS,
+                        default="backtracker")
+    parser.add_argument("--seed", help='The seed of the maze, the same seed always gives the same maze.', type=int,
+                        default=0)
+    parser.add_argument("--loops", help='The share of the remaining inner walls knocked down after carving, e.g., '
+                                        '0.05. Without it the maze has exactly one path between any two cells.',
+                        type=float, default=0.)
+
+    args = parser.parse_args()
+
+    if args.width < 1 or args.height < 1:
+        parser.error("The maze needs at least one column and one row.")
+    if not 0 <= args.loops <= 1:
+        parser.error("The share of knocked down walls has to be between 0 and 1.")
+    write_walls(*generate_walls(args.width, args.height, args.seed, args.loops, args.algorithm), args.output)
+    print(f"Maze saved as {args.output}")
@@ -1,12 +1,58 @@
+import copy
+import os
+import random
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from pstats import Stats
 
-from maze import Maze
+import numpy as np
+from alive_progress import config_handler
+from numpy.lib.stride_tricks import as_strided
+
+from checkpoint import CHECKPOINT_FILE
+from maze import PLANNERS, Maze
+from metrics import metrics, timed
+from maze_binary import CACHE_DIR, cache_path, read_binary, write_binary
+from raster import RESOLUTION
+from tiled_walls import read_tiled
 import argparse
 import cProfile as cp
 
 
-def maze_reader(maze_file: str):
+WALL, OPEN, NEWLINE, CARRIAGE_RETURN = ord("#"), ord("."), ord("\n"), ord("\r")
+
+
+def _map_lines(maze_file: str):
+    """ Memory-maps the maze file as a (lines, characters) byte matrix without copying it. Returns None when the file
+    is not made of equally long lines of printable characters, as stripping its lines could then change it """
+    size = os.path.getsize(maze_file)
+    if size == 0:
+        return None
+    data = np.memmap(maze_file, dtype=np.uint8, mode="r")
+    newlines = np.flatnonzero(data[:1 << 16] == NEWLINE)
+    if not newlines.size:
+        newlines = np.flatnonzero(data == NEWLINE)[:1]
+    stride = int(newlines[0]) + 1 if newlines.size else size + 1
+    line_end = stride - 1
+    if line_end > 0 and newlines.size and data[line_end - 1] == CARRIAGE_RETURN:
+        line_end -= 1
+    # The last line may miss its line ending, every other one has to end exactly at the stride
+    if line_end == 0 or size % stride not in (0, line_end):
+        return None
+    lines = -(-size // stride)
+    full_lines = size // stride
+
+    grid = as_strided(data, shape=(lines, line_end), strides=(stride, 1))
+    endings = as_strided(data[line_end:], shape=(full_lines, stride - line_end), strides=(stride, 1))
+    if np.any(endings[:, -1] != NEWLINE) or np.any(endings[:, :-1] != CARRIAGE_RETURN):
+        return None
+    if np.any((grid <= 32) | (grid >= 127)):
+        return None
+    return grid
+
+
+def _read_lines(maze_file: str):
+    """ Reads the stripped lines of the maze file into a (lines, characters) matrix of code points """
     input_lines = list()
     try:
         with open(maze_file, 'r') as file:
@@ -20,47 +66,111 @@ def maze_reader(maze_file: str):
     if len(line_lengths) != 1:
         raise ValueError("The maze file may be missing a line.")
 
-    if not all(c == "#" for c in input_lines[0]) or not all(c == "#" for c in input_lines[-1]):
+    return np.frombuffer("".join(input_lines).encode("utf-32-le"), dtype=np.uint32).reshape(len(input_lines), -1)
+
+
+def _validate(grid):
+    """ Checks the maze matrix line by line in the order the walls are read, raising the error of the first problem """
+    if not np.all(grid[0] == WALL) or not np.all(grid[-1] == WALL):
         raise ValueError
 
-    height = len(input_lines) // 2
-    width = len(input_lines[0]) // 2
+    lines, length = grid.shape
+    height = lines // 2
+    width = length // 2
+
+    missing_outer = (grid[:, 0] != WALL) | (grid[:, -1] != WALL)
+    if length != 2 * width + 1:
+        missing_outer[:] = True
+    invalid = (grid != WALL) & (grid != OPEN)
+    wrong_lines = missing_outer | invalid.any(axis=1)
+    if wrong_lines.any():
+        i = int(np.argmax(wrong_lines))
+        if missing_outer[i] and i % 2 == 0:
+            raise ValueError(f"Line {i+1} is not a valid horizontal wall line as it's missing the outer wall.")
+        if missing_outer[i]:
+            raise ValueError(f"Line {i+1} is not a valid vertical wall line as it's missing the outer wall.")
+        j = int(np.argmax(invalid[i]))
+        raise ValueError(f"Invalid character at position {j + 1} in line {i + 1}.")
+
+    intersections = grid[0::2, 0:2 * width:2] != WALL
+    if intersections.any():
+        y, x = np.unravel_index(np.argmax(intersections), intersections.shape)
+        raise ValueError(f"The wall intersections in the file are incorrect. "
+                         f"The character at {y * 2 + 1}:{x * 2 + 1} seems wrong. It should be a '#'.")
+    if lines % 2 == 0:
+        raise ValueError("There is something wrong with the maze file.")
+
+
+def maze_reader(maze_file: str):
+    try:
+        grid = _map_lines(maze_file)
+    except FileNotFoundError:
+        raise IOError
+    if grid is None:
+        grid = _read_lines(maze_file)
 
-    for i, line in enumerate(input_lines):
-        if i % 2 == 0:  # Horizontal wall line
-            if len(line) != 2 * width + 1 or not line.startswith('#') or not line.endswith('#'):
-                raise ValueError(f"Line {i+1} is not a valid horizontal wall line as it's missing the outer wall.")
-        else:  # Vertical wall line
-            if len(line) != 2 * width + 1 or line[0] != '#' or line[-1] != '#':
-                raise ValueError(f"Line {i+1} is not a valid vertical wall line as it's missing the outer wall.")
-        for j, c in enumerate(line):
-            if c not in "#.":
-                raise ValueError(f"Invalid character at position {j + 1} in line {i + 1}.")
+    _validate(grid)
 
+    height = grid.shape[0] // 2
+    width = grid.shape[1] // 2
     maze = Maze(width=width, height=height)
 
+    # The file's first line is the top of the maze, so the rows are flipped to count the wall lines from the bottom
+    horizontal = grid[-3:0:-2, 1::2] == WALL
+    vertical = grid[-2::-2, 2:-2:2] == WALL
+    maze.add_walls(horizontal.T, vertical.T)
+
+    return maze
+
+
+@timed("parse")
+def load_maze(maze_file: str, cache_dir: str | None = CACHE_DIR):
+    """ Reads a binary maze directly and opens a tiled maze on disk. A text maze is parsed once and then loaded from
+    the binary copy in the cache folder, found by the hash of its content """
+    if maze_file.endswith(".mzb"):
+        return read_binary(maze_file)
+    if maze_file.endswith(".mzt"):
+        return read_tiled(maze_file)
+    if cache_dir is None:
+        return maze_reader(maze_file)
+
     try:
-        for y in range(height + 1):  # Horizontal wall lines are at even indices
-            horizontal_line = input_lines[2 * y]
-            for x in range(width):
-                if horizontal_line[2 * x] != '#':
-                    raise ValueError(f"The wall intersections in the file are incorrect. "
-                                     f"The character at {y * 2 + 1}:{x * 2 + 1} seems wrong. It should be a '#'.")
-                if horizontal_line[2 * x + 1] == '#':
-                    maze.add_horizontal_wall(x, height - y)
-
-        # Process vertical walls
-        for y in range(height):  # Vertical wall lines are at odd indices
-            vertical_line = input_lines[2 * y + 1]
-            for x in range(width + 1):
-                if vertical_line[2 * x] == '#':
-                    maze.add_vertical_wall(height - y - 1, x)
-    except IndexError:
-        raise ValueError("There is something wrong with the maze file.")
+        cached_file = cache_path(maze_file, cache_dir)
+    except FileNotFoundError:
+        raise IOError
+    if os.path.exists(cached_file):
+        return read_binary(cached_file)
 
+    maze = maze_reader(maze_file)
+    os.makedirs(cache_dir, exist_ok=True)
+    write_binary(maze, cached_file)
     return maze
 
 
+def hope_run(maze: Maze, starting: list[int], goal: list[int], seed: int):
+    """ Runs one exploration on a fresh copy of the maze with its own seeded random heuristic """
+    maze = copy.deepcopy(maze)
+    maze.seed = seed
+    return maze.shortest_path(starting=starting, goal=goal)
+
+
+_hope_maze = None
+
+
+def _init_hope_worker(maze: Maze, collect_metrics: bool = False):
+    """ Keeps the parsed maze in every worker process, so it is only handed over once """
+    global _hope_maze
+    _hope_maze = maze
+    metrics.enabled = collect_metrics
+    config_handler.set_global(disable=True)
+
+
+def _hope_worker(job):
+    """ Returns the run's result with the metrics it collected, for the main process to add up """
+    metrics.reset()
+    return hope_run(_hope_maze, *job), metrics.to_dict()
+
+
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="ECS Maze Runner")
@@ -82,15 +192,57 @@ if __name__ == "__main__":
     parser.add_argument("--decay", help='The amount of decay for each floodfill layer,', default=0.998)
     parser.add_argument("--factor", help='The amount of (positive and negative) randomness in the heuristics', default=0.1)
     parser.add_argument("--heat_map", help="If '--floodfill_data_display' is being used, this accompanies the data with a heatmap. (negatively influences speed)", action=argparse.BooleanOptionalAction, default=False)
-    parser.add_argument("maze", help='The name of the maze file, e.g., maze1.mz')
+    parser.add_argument("--video", help="Streams every rendered step straight into exploration.mp4 in the run folder. "
+                                        "Images are only kept as well with '--save_images'. (Requires opencv-python)",
+                        action=argparse.BooleanOptionalAction, default=False)
+    parser.add_argument("--frame_rate", help='The frame rate of the streamed video.', default=5.)
+    parser.add_argument("--live_view", help="Keeps one figure open for the whole run and only redraws what changed "
+                                            "between steps when saving or displaying images.",
+                        action=argparse.BooleanOptionalAction, default=False)
+    parser.add_argument("--renderer", help="'raster' paints the images straight into pixel arrays with NumPy instead of "
+                                           "drawing them with matplotlib, which is fast enough to render every step "
+                                           "of large mazes.", choices=["matplotlib", "raster"], default="matplotlib")
+    parser.add_argument("--resolution", help="The side length in pixels of the raster images. Mazes with more cells "
+                                             "per side are drawn with each pixel standing for a block of cells.",
+                        type=int, default=RESOLUTION)
+    parser.add_argument("--planner", help="How the flood values are updated after each step. 'incremental' only repairs "
+                                          "the cells affected by newly sensed walls and takes the same route as "
+                                          "'floodfill'. 'astar' only plans a shortest route from the runner to the "
+                                          "goal and follows it until a wall cuts it, which may take another route "
+                                          "and ignores the euclidian and hope modes.",
+                        choices=PLANNERS, default="floodfill")
+    parser.add_argument("--cache", help=f"Loads text mazes from a binary copy in '{CACHE_DIR}' after the first run.",
+                        action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--workers", help='The amount of processes the hope runs are spread across.', default=1)
+    parser.add_argument("--seed", help='The seed of the first hope run, the following runs use the next seeds. '
+                                       'Picked at random and printed if not given.', default=None)
+    parser.add_argument("--log_format", help="Streams the exploration into the run's folder while it runs instead of "
+                                             "writing it at the end. 'rle' writes a compact binary log in which runs "
+                                             "of straight steps take up a single record.",
+                        choices=["csv", "rle"], default="csv")
+    parser.add_argument("--checkpoint_steps", help="Writes a checkpoint of the exploration into the run's folder "
+                                                   "every this many steps.", type=int, default=None)
+    parser.add_argument("--checkpoint_seconds", help="Writes a checkpoint of the exploration into the run's folder "
+                                                     "every this many seconds, 0 for none.", type=float, default=60.)
+    parser.add_argument("--resume", help="Continues the exploration of a run that was stopped from its last "
+                                         "checkpoint, e.g., --resume large_maze2__<id>. The starting position, goal, "
+                                         "planner and log format are those of the checkpoint.", default=None)
+    parser.add_argument("--metrics", help='Writes the time spent in each phase and counters of the run to this JSON '
+                                          'file, e.g., metrics.json', default=None)
+    parser.add_argument("--profile", help='Profiles the run with cProfile and prints the 10 most expensive functions.',
+                        action=argparse.BooleanOptionalAction, default=False)
+    parser.add_argument("maze", help='The name of the maze file, e.g., maze1.mz or maze1.mzb')
 
     args = parser.parse_args()
+    metrics.enabled = args.metrics is not None
 
-    run_id = (args.maze + "_" + str(uuid.uuid4())).replace(".mz", "_")
+    run_id = (args.maze + "_" + str(uuid.uuid4())).replace(".mz", "_") if args.resume is None else args.resume
+    if args.resume is not None and args.hope_mode and not args.euclidian_only:
+        parser.error("Hope runs can not be resumed.")
 
     if args.hope_mode and not args.euclidian_only:
 
-        maze = maze_reader(args.maze)
+        maze = load_maze(args.maze, CACHE_DIR if args.cache else None)
 
         try:
             if args.starting is not None:
@@ -127,25 +279,33 @@ if __name__ == "__main__":
 
         maze.render_settings = (args.save_images, args.display_images, float(
             args.display_time), args.floodfill_data_display, args.euclidian_only,
-                                args.hope_mode, float(args.decay), float(args.factor), args.heat_map)
+                                args.hope_mode, float(args.decay), float(args.factor), args.heat_map,
+                                args.live_view, args.video, float(args.frame_rate), args.renderer, args.resolution)
 
         maze.run_id = run_id
-
-        scores = [maze.shortest_path(starting=starting, goal=goal)]
-
-        for i in range(int(args.hope_runs) - 1):
-            maze = maze_reader(args.maze)
-            maze.render_settings = (args.save_images, args.display_images, float(
-                args.display_time), args.floodfill_data_display, args.euclidian_only,
-                                    args.hope_mode, float(args.decay), float(args.factor), args.heat_map)
-            maze.run_id = run_id
-            scores.append(maze.shortest_path(starting=starting, goal=goal))
+        maze.planner = args.planner
+
+        seed = int(args.seed) if args.seed is not None else random.randrange(2 ** 32)
+        print("Hope seed:", seed)
+        jobs = [(starting, goal, seed + i) for i in range(int(args.hope_runs))]
+
+        if int(args.workers) > 1:
+            with ProcessPoolExecutor(max_workers=int(args.workers), initializer=_init_hope_worker,
+                                     initargs=(maze, metrics.enabled)) as executor:
+                scores = []
+                for score, worker_metrics in executor.map(_hope_worker, jobs):
+                    scores.append(score)
+                    metrics.merge(worker_metrics)
+        else:
+            scores = [hope_run(maze, *job) for job in jobs]
         print(min(scores, key=lambda x: x[-1]))
 
     else:
 
-        maze = maze_reader(args.maze)
+        maze = load_maze(args.maze, CACHE_DIR if args.cache else None)
         maze.run_id = run_id
+        maze.planner = args.planner
+        maze.log_format = args.log_format
 
         try:
             if args.starting is not None:
@@ -182,18 +342,29 @@ if __name__ == "__main__":
 
         maze.render_settings = (args.save_images, args.display_images, float(
             args.display_time), args.floodfill_data_display, args.euclidian_only,
-                                args.hope_mode, float(args.decay), float(args.factor), args.heat_map)
+                                args.hope_mode, float(args.decay), float(args.factor), args.heat_map,
+                                args.live_view, args.video, float(args.frame_rate), args.renderer, args.resolution)
 
         print(maze.render_settings)
 
-        pr = cp.Profile()
-        pr.enable()
+        maze.checkpoint_steps = args.checkpoint_steps
+        maze.checkpoint_seconds = args.checkpoint_seconds or None
+        if args.resume is not None:
+            starting, goal = (list(cell) for cell in maze.resume(os.path.join(run_id, CHECKPOINT_FILE)))
+            print("Resuming run", run_id, "from step", maze.steps)
+
+        if args.profile:
+            pr = cp.Profile()
+            pr.enable()
 
         maze.shortest_path(starting=starting, goal=goal)
         maze.build_files(args.maze)
 
-        pr.disable()
-        stats = Stats(pr)
-        stats.sort_stats('tottime').print_stats(10)
+        if args.profile:
+            pr.disable()
+            stats = Stats(pr)
+            stats.sort_stats('tottime').print_stats(10)
 
+    if args.metrics is not None:
+        metrics.write(args.metrics)
     print("DONE RUNNING", "starting", starting, "goal", goal)
\ No newline at end of file
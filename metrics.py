@@ -0,0 +1,80 @@
+import contextlib
+import functools
+import json
+import time
+from collections import defaultdict
+
+
+class Metrics:
+    """ Collects wall times per phase, counters and per-step observations of a run. It is off by default and every
+    call returns straight away then, so the instrumented code does not slow down normal runs """
+
+    def __init__(self):
+        self.enabled = False
+        self.timings = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.observations = {}
+
+    def timer(self, phase: str):
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._timer(phase)
+
+    @contextlib.contextmanager
+    def _timer(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[phase] += time.perf_counter() - start
+
+    def count(self, name: str, amount: int = 1):
+        if self.enabled:
+            self.counts[name] += amount
+
+    def observe(self, name: str, value: float):
+        """ Keeps the number, total and maximum of a value seen once per step instead of every single value """
+        if not self.enabled:
+            return
+        count, total, maximum = self.observations.get(name, (0, 0, value))
+        self.observations[name] = (count + 1, total + value, max(maximum, value))
+
+    def reset(self):
+        self.timings.clear()
+        self.counts.clear()
+        self.observations.clear()
+
+    def to_dict(self) -> dict:
+        return {"timings": dict(self.timings), "counts": dict(self.counts),
+                "observations": {name: {"count": count, "total": total, "max": maximum, "mean": total / count}
+                                 for name, (count, total, maximum) in self.observations.items()}}
+
+    def merge(self, other: dict):
+        """ Adds the metrics another process collected, as returned by its to_dict """
+        for phase, seconds in other["timings"].items():
+            self.timings[phase] += seconds
+        for name, amount in other["counts"].items():
+            self.counts[name] += amount
+        for name, data in other["observations"].items():
+            count, total, maximum = self.observations.get(name, (0, 0, data["max"]))
+            self.observations[name] = (count + data["count"], total + data["total"], max(maximum, data["max"]))
+
+    def write(self, metrics_file: str):
+        with open(metrics_file, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+
+metrics = Metrics()
+
+
+def timed(phase: str):
+    """ Adds the wall time of every call of the decorated function to the phase """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return function(*args, **kwargs)
+            with metrics.timer(phase):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
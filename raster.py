@@ -0,0 +1,329 @@
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from rendering import flood_heatmap, write_video_frame
+from runner import STEPS, Runner
+
+# The wall bits of a cell as in maze.py, which imports this module
+NORTH, EAST, SOUTH, WEST = 1, 2, 4, 8
+# The number of pixels along the longer side of a frame
+RESOLUTION = 1024
+# Below this many pixels per cell a pixel stands for a square block of cells instead, shaded by how many walls it holds
+MIN_CELL_PIXELS = 3
+# The side length in cells of the regions the wall shading is first read in, rounded to whole blocks
+SHADING_REGION = 512
+PNG_COMPRESSION = 1
+# The threads the PNG files are compressed on while the run goes on, zlib lets go of the GIL while it compresses
+PNG_THREADS = 2
+# Walls are a pixel wide plus two more for every this many pixels per cell
+WALL_WIDTH_DIVISOR = 32
+
+BACKGROUND = (255, 255, 255)
+HORIZONTAL_WALL = (255, 0, 0)
+VERTICAL_WALL = (0, 128, 0)
+ARROW = (255, 255, 0)
+# The colors of the cell marks in increasing precedence, a block of cells shows the highest mark of any of them
+VISITED, PATH, GOAL, RUNNER = 1, 2, 3, 4
+MARK_COLORS = np.array([BACKGROUND, (211, 211, 211), (255, 192, 203), (255, 255, 0), (0, 0, 255)], dtype=np.uint8)
+WALL_COUNTS = np.array([bin(bits).count("1") for bits in range(16)], dtype=np.float64)
+# The blue, gray and red the coolwarm colormap runs through from the lowest to the highest flood value
+COOLWARM = np.array([(59, 76, 192), (221, 221, 221), (180, 4, 38)], dtype=np.float64)
+# The heatmap colors in as many steps as a matplotlib colormap has
+HEAT_LEVELS = 256
+HEAT_TABLE = np.stack([np.interp(np.linspace(0, 1, HEAT_LEVELS), np.linspace(0, 1, len(COOLWARM)), COOLWARM[:, channel])
+                       for channel in range(3)], axis=-1).astype(np.uint8)
+
+
+def heat_colors(values: np.ndarray, finite: np.ndarray) -> np.ndarray:
+    """ The coolwarm color of every value, scaled from the lowest to the highest of the finite ones. The others get
+    the lowest color """
+    low, high = values.min(where=finite, initial=np.inf), values.max(where=finite, initial=-np.inf)
+    scale = (HEAT_LEVELS - 1) / (high - low) if high > low else 0.
+    levels = np.subtract(values, low, where=finite, out=np.zeros_like(values))
+    levels *= scale
+    return np.take(HEAT_TABLE, levels.astype(np.uint8), axis=0)
+
+
+def block_reduce(values: np.ndarray, block: int, reduce, fill) -> np.ndarray:
+    """ Reduces every block x block square of a 2D array to one value, padding the last ones with fill """
+    width, height = values.shape
+    padded_width, padded_height = -(-width // block) * block, -(-height // block) * block
+    if (padded_width, padded_height) != values.shape:
+        values = np.pad(values, ((0, padded_width - width), (0, padded_height - height)), constant_values=fill)
+    return reduce(values.reshape(padded_width // block, block, padded_height // block, block), axis=(1, 3))
+
+
+def widen(pixels: np.ndarray, half_width: int, axis: int) -> np.ndarray:
+    """ Adds half_width pixels on both sides of the set pixels along an axis """
+    widened = pixels.copy()
+    # Transposed views, so the shifts below always run along the second axis
+    target, source = (widened, pixels) if axis == 1 else (widened.T, pixels.T)
+    for shift in range(1, half_width + 1):
+        target[:, shift:] |= source[:, :-shift]
+        target[:, :-shift] |= source[:, shift:]
+    return widened
+
+
+def write_png(png_file: str, image: np.ndarray):
+    """ Writes an RGB image as an unfiltered PNG, compressed for speed rather than size. Compressing still takes
+    about 10 to 50 ms for a 1024 pixel image, depending on how busy it is, which is many times the cost of painting it """
+    height, width = image.shape[:2]
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, -1)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    with open(png_file, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        file.write(chunk(b"IDAT", zlib.compress(rows.tobytes(), PNG_COMPRESSION)))
+        file.write(chunk(b"IEND", b""))
+
+
+class RasterView:
+    """ Paints the frames of a maze straight into an RGB image with NumPy. A maze with more cells per side than fit the
+    resolution is drawn at a lower level of detail, where each pixel is a block of cells. Walls are only ever added
+    and cells only ever visited around the runner, so after the first frame only the blocks next to it are painted
+    again, on a canvas the goal and runner are copied onto """
+
+    def __init__(self, maze, resolution: int = RESOLUTION):
+        self._maze = maze
+        width, height = maze.width, maze.height
+        self.cell_pixels = resolution // max(width, height)
+        self.detailed = self.cell_pixels >= MIN_CELL_PIXELS
+        if self.detailed:
+            self.block = 1
+        else:
+            self.cell_pixels = 1
+            self.block = -(-max(width, height) // resolution)
+        # The blocks of cells along each axis, each block drawn as a square of cell_pixels pixels
+        self.shape = (-(-width // self.block), -(-height // self.block))
+        # A detailed frame has one more row and column of pixels for the top and right outer walls
+        edge = int(self.detailed)
+        self.image_shape = (self.shape[1] * self.cell_pixels + edge, self.shape[0] * self.cell_pixels + edge, 3)
+        self._half_width = self.cell_pixels // WALL_WIDTH_DIVISOR
+        self._visited = np.zeros(self.shape, dtype=bool)
+        self._shading = None if self.detailed else np.empty(self.shape, dtype=np.uint8)
+        self._shaded = False
+        self._heat = None
+        self._canvas = None
+        self._figure = None
+        self._image = None
+        self._png_writer = None
+        self._png_writes = deque()
+
+    def _shade(self, x0: int, y0: int, x1: int, y1: int):
+        """ Shades the blocks of the cells from (x0, y0) up to (x1, y1), which lie on block boundaries, from white for
+        no walls to black for four walls on every cell """
+        block = self.block
+        counts = WALL_COUNTS[self._maze.wall_region(x0, y0, x1, y1)]
+        walls = block_reduce(counts, block, np.sum, 0)
+        cells = block_reduce(np.ones_like(counts), block, np.sum, 0)
+        self._shading[x0 // block:-(-x1 // block), y0 // block:-(-y1 // block)] = 255 - walls / cells * 255 / 4
+
+    def _heat_colors(self) -> tuple[np.ndarray, np.ndarray] | None:
+        """ The heatmap color of every block and which blocks have one, if the heatmap is drawn """
+        maze = self._maze
+        flood_array = maze.flood_array
+        if not (maze.render_settings[3] and maze.render_settings[8] and flood_array is not None):
+            return None
+        # The incremental planner's values are read as a whole array instead of cell by cell
+        if hasattr(flood_array, "grid"):
+            values = flood_array.grid()
+        else:
+            values = flood_heatmap(flood_array, maze.width, maze.height).T
+        # The lowest flood value of a block is the one of the cell the runner would head for
+        values = block_reduce(values, self.block, np.min, np.inf) if self.block > 1 else values
+        finite = np.isfinite(values)
+        return heat_colors(values, finite), finite
+
+    def _base_colors(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """ The background of the blocks from (x0, y0) up to (x1, y1), shaded by their walls unless detailed """
+        if self.detailed:
+            return np.full((x1 - x0, y1 - y0, 3), BACKGROUND, dtype=np.uint8)
+        return np.repeat(self._shading[x0:x1, y0:y1, None], 3, axis=2)
+
+    def _block_colors(self, x0: int, y0: int, x1: int, y1: int, marks: list) -> np.ndarray:
+        """ The colors of the blocks from (x0, y0) up to (x1, y1), with the x axis first. marks holds (blocks, mark)
+        pairs in increasing precedence """
+        if self._heat is not None:
+            # Nearly every cell has a flood value, so only the few without one are given their usual color
+            colors = self._heat[0][x0:x1, y0:y1].copy()
+            unheated = ~self._heat[1][x0:x1, y0:y1]
+            if unheated.any():
+                colors[unheated] = self._base_colors(x0, y0, x1, y1)[unheated]
+        else:
+            colors = self._base_colors(x0, y0, x1, y1)
+        colors[self._visited[x0:x1, y0:y1]] = MARK_COLORS[VISITED]
+        for blocks, mark in marks:
+            inside = ((blocks[:, 0] >= x0) & (blocks[:, 0] < x1) & (blocks[:, 1] >= y0) & (blocks[:, 1] < y1))
+            colors[blocks[inside, 0] - x0, blocks[inside, 1] - y0] = MARK_COLORS[mark]
+        return colors
+
+    def _draw_walls(self, pixels: np.ndarray, px0: int, py0: int):
+        """ Draws every wall crossing the pixels whose lower left one is (px0, py0) as a line on the border between
+        the cells, red if horizontal, green if vertical """
+        maze = self._maze
+        size = self.cell_pixels
+        # The cells around the pixels as well, as the walls between them reach into their neighbors
+        x0, y0 = max(px0 // size - 1, 0), max(py0 // size - 1, 0)
+        x1 = min((px0 + pixels.shape[0]) // size + 1, maze.width)
+        y1 = min((py0 + pixels.shape[1]) // size + 1, maze.height)
+        grid = maze.wall_region(x0, y0, x1, y1)
+        width, height = grid.shape
+        horizontal = np.zeros((width, height + 1), dtype=bool)
+        horizontal[:, :-1] = grid & SOUTH
+        horizontal[:, -1] = grid[:, -1] & NORTH
+        vertical = np.zeros((width + 1, height), dtype=bool)
+        vertical[:-1] = grid & WEST
+        vertical[-1] = grid[-1] & EAST
+
+        # Each wall covers the pixels of its cell side and the corner pixel after it, widened on both sides in large
+        # cells
+        crop = (slice(px0 - x0 * size, px0 - x0 * size + pixels.shape[0]),
+                slice(py0 - y0 * size, py0 - y0 * size + pixels.shape[1]))
+        lines = np.zeros((width * size + 1, height + 1), dtype=bool)
+        lines[:-1] = horizontal.repeat(size, axis=0)
+        lines[size::size] |= horizontal
+        walls = np.zeros((width * size + 1, height * size + 1), dtype=bool)
+        walls[:, ::size] = lines
+        pixels[widen(walls, self._half_width, axis=1)[crop]] = HORIZONTAL_WALL
+        lines = np.zeros((width + 1, height * size + 1), dtype=bool)
+        lines[:, :-1] = vertical.repeat(size, axis=1)
+        lines[:, size::size] |= vertical
+        walls[:] = False
+        walls[::size] = lines
+        pixels[widen(walls, self._half_width, axis=0)[crop]] = VERTICAL_WALL
+
+    def _draw_arrow(self, pixels: np.ndarray, px0: int, py0: int, runner: Runner):
+        """ Draws the runner's orientation as a line from the middle of its cell towards the side it faces """
+        size = self.cell_pixels
+        half_width = self._half_width
+        dx, dy = STEPS[runner.orientation]
+        center_x, center_y = runner.x * size + size // 2 - px0, runner.y * size + size // 2 - py0
+        for offset in range((size - 1) // 2 - half_width):
+            x, y = center_x + dx * offset, center_y + dy * offset
+            pixels[x - half_width:x + half_width + 1, y - half_width:y + half_width + 1] = ARROW
+
+    def _paint(self, image: np.ndarray, x0: int, y0: int, x1: int, y1: int, marks: list = [],
+               runner: Runner | None = None):
+        """ Paints the blocks from (x0, y0) up to (x1, y1) onto an image in the layout of frame """
+        size = self.cell_pixels
+        edge = int(self.detailed)
+        px0, py0 = x0 * size, y0 * size
+        px1 = x1 * size + (edge if x1 == self.shape[0] else 0)
+        py1 = y1 * size + (edge if y1 == self.shape[1] else 0)
+
+        pixels = np.empty((px1 - px0, py1 - py0, 3), dtype=np.uint8)
+        pixels[:] = BACKGROUND
+        colors = self._block_colors(x0, y0, x1, y1, marks)
+        if size > 1:
+            colors = colors.repeat(size, axis=0).repeat(size, axis=1)
+        pixels[:(x1 - x0) * size, :(y1 - y0) * size] = colors
+        if self.detailed:
+            self._draw_walls(pixels, px0, py0)
+            if runner is not None:
+                self._draw_arrow(pixels, px0, py0, runner)
+        rows = image.shape[0]
+        image[rows - py1:rows - py0, px0:px1] = pixels.transpose(1, 0, 2)[::-1]
+
+    def frame(self, runner: Runner, goal: tuple[int, int], final_path: list = []) -> np.ndarray:
+        """ The maze as a (rows, columns, 3) RGB image with the top row first, as image files store them """
+        maze = self._maze
+        block = self.block
+        x, y = runner.x // block, runner.y // block
+        self._visited[x, y] = True
+        # The blocks holding the runner's walls and those of its neighbors on the other side of them
+        x0, y0 = max(runner.x - 1, 0) // block, max(runner.y - 1, 0) // block
+        x1 = min(runner.x + 1, maze.width - 1) // block + 1
+        y1 = min(runner.y + 1, maze.height - 1) // block + 1
+        if self._shading is not None:
+            if not self._shaded:
+                region = -(-SHADING_REGION // block) * block
+                for shade_x in range(0, maze.width, region):
+                    for shade_y in range(0, maze.height, region):
+                        self._shade(shade_x, shade_y, min(shade_x + region, maze.width),
+                                    min(shade_y + region, maze.height))
+                self._shaded = True
+            else:
+                self._shade(x0 * block, y0 * block, min(x1 * block, maze.width), min(y1 * block, maze.height))
+
+        marks = [(np.array([goal], dtype=np.int64) // block, GOAL), (np.array([[x, y]]), RUNNER)]
+        self._heat = self._heat_colors()
+        if final_path or self._heat is not None:
+            # The heatmap changes with every step and the final path is only drawn at the end, so both are painted
+            # onto a whole new image
+            path = np.asarray(final_path, dtype=np.int64).reshape(-1, 2) // block
+            image = np.empty(self.image_shape, dtype=np.uint8)
+            self._paint(image, 0, 0, *self.shape, [(path, PATH)] + marks, runner)
+            self._canvas = None
+            return image
+
+        if self._canvas is None:
+            self._canvas = np.empty(self.image_shape, dtype=np.uint8)
+            self._paint(self._canvas, 0, 0, *self.shape)
+        else:
+            self._paint(self._canvas, x0, y0, x1, y1)
+        image = self._canvas.copy()
+        goal_x, goal_y = marks[0][0][0]
+        self._paint(image, goal_x, goal_y, goal_x + 1, goal_y + 1, marks)
+        self._paint(image, x, y, x + 1, y + 1, marks, runner)
+        return image
+
+    def update(self, runner: Runner, goal: tuple[int, int], num: int, final_path: list = []):
+        maze = self._maze
+        frame = self.frame(runner, goal, final_path)
+        if maze.render_settings[0]:
+            try:
+                os.mkdir(maze.run_id)
+            except FileExistsError:
+                pass
+            self._save(os.path.join(maze.run_id, f"{num}.png"), frame)
+
+        if maze.render_settings[10]:
+            write_video_frame(maze.run_id, frame, maze.render_settings[11])
+
+        if maze.render_settings[1]:
+            self._show(frame, maze.render_settings[2])
+
+    def _save(self, png_file: str, frame: np.ndarray):
+        """ Writes the frame on a background thread, as compressing it takes far longer than painting it. Once more
+        frames wait than there are threads, the run waits for the oldest, so they never pile up in memory """
+        if self._png_writer is None:
+            self._png_writer = ThreadPoolExecutor(PNG_THREADS)
+        self._png_writes.append(self._png_writer.submit(write_png, png_file, frame))
+        while len(self._png_writes) > 2 * PNG_THREADS:
+            self._png_writes.popleft().result()
+
+    def _show(self, frame: np.ndarray, display_time: float):
+        """ Displays the frames in one figure, the only part of this view that uses matplotlib """
+        import matplotlib.pyplot as plt
+
+        if self._figure is None:
+            self._figure = plt.figure(figsize=(10, 10))
+            ax = self._figure.gca()
+            ax.set_axis_off()
+            self._image = ax.imshow(frame, interpolation='nearest')
+            plt.show(block=False)
+        else:
+            self._image.set_data(frame)
+        self._figure.canvas.draw_idle()
+        plt.pause(display_time)
+
+    def close(self):
+        if self._png_writer is not None:
+            while self._png_writes:
+                self._png_writes.popleft().result()
+            self._png_writer.shutdown()
+            self._png_writer = None
+        if self._figure is not None:
+            import matplotlib.pyplot as plt
+
+            plt.close(self._figure)
+            self._figure = None
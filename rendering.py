@@ -0,0 +1,210 @@
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.patches import FancyArrow
+
+from runner import Runner, get_x, get_y, get_orientation
+
+ARROW_OFFSETS = {"N": (0, 0.3), "E": (0.3, 0), "S": (0, -0.3), "W": (-0.3, 0)}
+CELL_CORNERS = np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=float)
+# The largest side length of a maze whose flood values are written into its cells when rendering
+FLOOD_TEXT_LIMIT = 40
+
+
+def wall_segments(maze) -> tuple[np.ndarray, np.ndarray]:
+    """ The start and end point of every horizontal and every vertical wall, as arrays of shape (walls, 2, 2) """
+    h_walls = np.array(maze.horizontal_walls, dtype=float).reshape(-1, 2)
+    v_walls = np.array(maze.vertical_walls, dtype=float).reshape(-1, 2)
+    return np.stack([h_walls, h_walls + (1, 0)], axis=1), np.stack([v_walls, v_walls + (0, 1)], axis=1)
+
+
+def colored_cells(runner: Runner, goal: tuple[int, int], final_path: list) -> tuple[list, list]:
+    """ The outlines and colors of the path cells, the goal and the runner, in drawing order """
+    colored_boxes = []
+
+    for step in final_path:
+        colored_boxes.append([step[0], step[1], "pink"])
+
+    colored_boxes.append([goal[0], goal[1], "yellow"])
+    colored_boxes.append([get_x(runner), get_y(runner), "blue"])
+
+    return [CELL_CORNERS + (x, y) for x, y, _ in colored_boxes], [color for _, _, color in colored_boxes]
+
+
+def flood_heatmap(flood_array: dict, width: int, height: int) -> np.ndarray:
+    """ The flood values as a (height, width) image, cells without one are left at infinity """
+    if hasattr(flood_array, "grid"):
+        return flood_array.grid().T
+    heatmap = np.full((height, width), np.inf)
+    if flood_array:
+        cells = np.array(list(flood_array.keys()))
+        heatmap[cells[:, 1], cells[:, 0]] = np.fromiter(flood_array.values(), dtype=float)
+    return heatmap
+
+
+def setup_axes(ax, width: int, height: int):
+    """ Hides the default axes and labels every row and column in their middle instead """
+    ax.set_xticks([])
+    ax.set_yticks([])
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['bottom'].set_visible(False)
+    ax.spines['left'].set_visible(False)
+
+    # Add custom axes showing x and y values
+    for x in range(width):
+        ax.text(x + 0.5, -0.5, str(x), ha='center', va='center', fontsize=10, color='black')  # x-axis values
+    for y in range(height):
+        ax.text(-0.5, y + 0.5, str(y), ha='center', va='center', fontsize=10, color='black')  # y-axis values
+
+    # Set grid and labels
+    ax.set_xlim(0, width)
+    ax.set_ylim(0, height)
+    ax.set_aspect('equal', adjustable='box')
+    ax.grid(visible=True, which='both', color='lightgray', linestyle='--', linewidth=0.5)
+
+
+# The open video of every run that streams its frames, shared by the runner's mind maze and the maze itself
+_video_writers = {}
+
+
+def write_video_frame(run_id: str, frame: np.ndarray, frame_rate: float):
+    """ Appends an RGB or RGBA frame to the run's video, which is opened when the run's first frame arrives """
+    import cv2
+
+    writer = _video_writers.get(run_id)
+    if writer is None:
+        try:
+            os.mkdir(run_id)
+        except FileExistsError:
+            pass
+        height, width = frame.shape[:2]
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')  # Codec for .mp4
+        writer = cv2.VideoWriter(os.path.join(run_id, "exploration.mp4"), fourcc, frame_rate, (width, height))
+        _video_writers[run_id] = writer
+    writer.write(cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR if frame.shape[2] == 4 else cv2.COLOR_RGB2BGR))
+
+
+def close_video(run_id: str):
+    writer = _video_writers.pop(run_id, None)
+    if writer is not None:
+        writer.release()
+
+
+class LiveView:
+    """ Keeps a single figure of a maze open for a whole run. Its static parts are drawn once and cached as the
+    background, every step only updates the artists whose data changed and blits them on top of it """
+
+    def __init__(self, maze):
+        self._maze = maze
+        self.figure = plt.figure(figsize=(10, 10))
+        ax = self.figure.gca()
+        self._ax = ax
+        width, height = maze.width, maze.height
+
+        self._heatmap = ax.imshow(np.full((height, width), np.inf), cmap='coolwarm', interpolation='nearest',
+                                  origin='lower', extent=[0, width, 0, height], animated=True, visible=False)
+        self._cells = PolyCollection([], linewidths=0, animated=True)
+        ax.add_collection(self._cells)
+        self._arrow = FancyArrow(0.5, 0.5, 0, 0.3, head_width=0.2, head_length=0.2, fc='yellow', ec='blue',
+                                 animated=True)
+        ax.add_patch(self._arrow)
+        self._h_walls = LineCollection([], colors="red", linewidths=2, capstyle="projecting", animated=True)
+        self._v_walls = LineCollection([], colors="green", linewidths=2, capstyle="projecting", animated=True)
+        ax.add_collection(self._h_walls)
+        ax.add_collection(self._v_walls)
+        self._labels = {}
+        self._label_values = {}
+        self._walls = None
+        setup_axes(ax, width, height)
+
+        self._background = None
+        self.figure.canvas.mpl_connect("draw_event", self._on_draw)
+        if maze.render_settings[1]:
+            plt.show(block=False)
+            plt.pause(0.01)
+        else:
+            self.figure.canvas.draw()
+
+    def _on_draw(self, event):
+        """ Any full redraw (the first one or after a resize) leaves out the animated artists, so it becomes the new
+        background they are blitted onto """
+        self._background = self.figure.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_artists()
+
+    def _animated_artists(self):
+        return [self._heatmap, self._cells, self._arrow, self._h_walls, self._v_walls, *self._labels.values()]
+
+    def _draw_artists(self):
+        for artist in self._animated_artists():
+            if artist.get_visible():
+                self._ax.draw_artist(artist)
+
+    def _update_walls(self):
+        if self._walls is not None and np.array_equal(self._walls, self._maze.wall_grid):
+            return
+        self._walls = self._maze.wall_grid.copy()
+        h_segments, v_segments = wall_segments(self._maze)
+        self._h_walls.set_segments(h_segments)
+        self._v_walls.set_segments(v_segments)
+
+    def _update_flood_values(self):
+        maze = self._maze
+        show_values = maze.render_settings[3] and maze.flood_array is not None
+        self._heatmap.set_visible(show_values and maze.render_settings[8])
+        if self._heatmap.get_visible():
+            self._heatmap.set_data(flood_heatmap(maze.flood_array, maze.width, maze.height))
+            self._heatmap.autoscale()
+
+        if not show_values or max(maze.width, maze.height) > FLOOD_TEXT_LIMIT:
+            for label in self._labels.values():
+                label.set_visible(False)
+            return
+        for cell, label in self._labels.items():
+            if cell not in maze.flood_array:
+                label.set_visible(False)
+        for (x, y), value in maze.flood_array.items():
+            label = self._labels.get((x, y))
+            if label is None:
+                # Center the text in the cell
+                label = self._ax.text(x + 0.5, y + 0.5, "", ha='center', va='center', fontsize=10, color='black',
+                                      animated=True)
+                self._labels[(x, y)] = label
+            if self._label_values.get((x, y)) != value:
+                label.set_text("{:.1f}".format(value))
+                self._label_values[(x, y)] = value
+            label.set_visible(True)
+
+    def update(self, runner: Runner, goal: tuple[int, int], num: int, final_path: list = []):
+        maze = self._maze
+        self._update_walls()
+        self._update_flood_values()
+        verts, colors = colored_cells(runner, goal, final_path)
+        self._cells.set_verts(verts)
+        self._cells.set_facecolor(colors)
+        dx, dy = ARROW_OFFSETS[get_orientation(runner)]
+        self._arrow.set_data(x=get_x(runner) + 0.5, y=get_y(runner) + 0.5, dx=dx, dy=dy)
+
+        canvas = self.figure.canvas
+        canvas.restore_region(self._background)
+        self._draw_artists()
+        canvas.blit(self.figure.bbox)
+
+        if maze.render_settings[0]:
+            try:
+                os.mkdir(maze.run_id)
+            except FileExistsError:
+                pass
+            plt.imsave(f'./{maze.run_id}/{num}.png', np.asarray(canvas.buffer_rgba()))
+
+        if maze.render_settings[10]:
+            write_video_frame(maze.run_id, np.asarray(canvas.buffer_rgba()), maze.render_settings[11])
+
+        if maze.render_settings[1]:
+            canvas.flush_events()
+            canvas.start_event_loop(maze.render_settings[2])
+
+    def close(self):
+        plt.close(self.figure)
@@ -1,46 +1,72 @@
+ORIENTATIONS = ("N", "E", "S", "W")
+# Lookup tables indexed by the orientation (0-3, in N, E, S, W order)
+LEFT = (3, 0, 1, 2)
+RIGHT = (1, 2, 3, 0)
+STEPS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+# The orientations to the left of, in front of and to the right of the runner, as sensed by its wall sensors
+SENSED = tuple((LEFT[orientation], orientation, RIGHT[orientation]) for orientation in range(4))
 
-def create_runner(x: int = 0, y: int = 0, orientation: str = "N") -> dict[str, any]:
-    return {"x": x, "y": y, "orientation": orientation}
 
+class Runner:
+    """ The runner's cell and orientation, the latter stored as an index into ORIENTATIONS. Indexing it with "x", "y"
+    and "orientation" still works as it did when runners were dicts """
+    __slots__ = ("x", "y", "orientation")
 
-def get_x(runner: dict[str, any]) -> int:
-    return runner["x"]
+    def __init__(self, x: int = 0, y: int = 0, orientation: int = 0):
+        self.x = x
+        self.y = y
+        self.orientation = orientation
 
+    def __getitem__(self, key: str):
+        if key == "orientation":
+            return ORIENTATIONS[self.orientation]
+        return getattr(self, key)
 
-def get_y(runner: dict[str, any]) -> int:
-    return runner["y"]
+    def __setitem__(self, key: str, value):
+        if key == "orientation":
+            value = ORIENTATIONS.index(value)
+        setattr(self, key, value)
 
+    def __eq__(self, other):
+        return isinstance(other, Runner) and (self.x, self.y, self.orientation) == (other.x, other.y, other.orientation)
 
-def get_orientation(runner: dict[str, any]) -> str:
-    return runner["orientation"]
+    def __repr__(self):
+        return f"Runner(x={self.x}, y={self.y}, orientation={ORIENTATIONS[self.orientation]!r})"
 
+    def copy(self) -> "Runner":
+        return Runner(self.x, self.y, self.orientation)
 
-def turn(runner: dict[str, any], direction: str) -> dict[str, any]:
-    new_orientations = orientation_options(runner)
+
+def create_runner(x: int = 0, y: int = 0, orientation: str = "N") -> Runner:
+    return Runner(x, y, ORIENTATIONS.index(orientation))
+
+
+def get_x(runner: Runner) -> int:
+    return runner.x
+
+
+def get_y(runner: Runner) -> int:
+    return runner.y
+
+
+def get_orientation(runner: Runner) -> str:
+    return ORIENTATIONS[runner.orientation]
+
+
+def turn(runner: Runner, direction: str) -> Runner:
     if direction == "Left":
-        runner["orientation"] = new_orientations[0]
+        runner.orientation = LEFT[runner.orientation]
     if direction == "Right":
-        runner["orientation"] = new_orientations[2]
+        runner.orientation = RIGHT[runner.orientation]
     return runner
 
 
 def orientation_options(runner):
-    orientations = ["N", "E", "S", "W"]
-    current_orientation = get_orientation(runner)
-    current_orientation_index = orientations.index(current_orientation)
-    new_orientations = [orientations[current_orientation_index - 1], current_orientation,
-                        orientations[(current_orientation_index + 1) % len(orientations)]]
-    return new_orientations
+    return [ORIENTATIONS[orientation] for orientation in SENSED[runner.orientation]]
 
 
 def forward(runner):
-    orientation = get_orientation(runner)
-    if orientation == "N":
-        runner["y"] += 1
-    elif orientation == "S":
-        runner["y"] -= 1
-    elif orientation == "E":
-        runner["x"] += 1
-    elif orientation == "W":
-        runner["x"] -= 1
+    dx, dy = STEPS[runner.orientation]
+    runner.x += dx
+    runner.y += dy
     return runner
@@ -0,0 +1,160 @@
+import argparse
+import contextlib
+import copy
+import csv
+import io
+import json
+import time
+from collections import OrderedDict
+
+import numpy as np
+from alive_progress import config_handler
+
+from batch import parse_coordinates
+from maze import OFFSETS, PLANNERS, WALL_BITS
+from maze_binary import CACHE_DIR
+from maze_runner import load_maze
+from metrics import metrics
+
+# The memory the cached distance fields may take up, 4 bytes per cell and goal
+BUDGET_MB = 256
+
+
+class MazeSession:
+    """ Holds one parsed maze and answers any number of (starting, goal) queries on it. The distances of the true maze
+    to each goal are kept in a least recently used cache bounded by a memory budget, so a shortest path to a goal that
+    was asked for before is answered without another search. Explorations only save the parsing """
+
+    def __init__(self, maze_file: str, planner: str = "floodfill", budget_mb: float = BUDGET_MB,
+                 cache_dir: str | None = CACHE_DIR):
+        self.maze = load_maze(maze_file, cache_dir)
+        self.maze_file = maze_file
+        self.planner = planner
+        self.budget = int(budget_mb * 1024 * 1024)
+        self._fields = OrderedDict()
+        self._field_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _check(self, cell) -> tuple[int, int]:
+        x, y = cell
+        if not (0 <= x < self.maze.width and 0 <= y < self.maze.height):
+            raise ValueError(f"({x}, {y}) lies outside of the {self.maze.width}x{self.maze.height} maze.")
+        return x, y
+
+    def distances(self, goal: tuple[int, int]) -> np.ndarray:
+        """ The steps from every cell to the goal on the true maze, -1 where it can not be reached """
+        goal = self._check(goal)
+        field = self._fields.get(goal)
+        if field is not None:
+            self._fields.move_to_end(goal)
+            self.hits += 1
+            metrics.count("distance_cache_hits")
+            return field
+
+        self.misses += 1
+        metrics.count("distance_cache_misses")
+        field = self.maze.distance_field(goal)
+        # A field larger than the whole budget is handed out without being kept
+        if field.nbytes <= self.budget:
+            while self._field_bytes + field.nbytes > self.budget:
+                _, evicted = self._fields.popitem(last=False)
+                self._field_bytes -= evicted.nbytes
+                self.evictions += 1
+                metrics.count("distance_cache_evictions")
+            self._fields[goal] = field
+            self._field_bytes += field.nbytes
+        return field
+
+    def shortest_path(self, starting: tuple[int, int], goal: tuple[int, int]) -> list[tuple[int, int]]:
+        """ A shortest path on the true maze, from the starting cell to the goal, both included. From each cell it
+        steps to the open neighbor one step closer to the goal with the smallest coordinates. It is empty if the goal
+        can not be reached """
+        field = self.distances(goal)
+        x, y = self._check(starting)
+        distance = int(field[x, y])
+        if distance < 0:
+            return []
+        all_walls = self.maze.wall_grid
+        path = [(x, y)]
+        while distance:
+            walls = all_walls[x, y]
+            x, y = min((x + dx, y + dy) for bit, (dx, dy) in zip(WALL_BITS, OFFSETS)
+                       if not walls & bit and field[x + dx, y + dy] == distance - 1)
+            path.append((x, y))
+            distance -= 1
+        return path
+
+    def explore(self, starting: tuple[int, int], goal: tuple[int, int], optimal: bool = False) -> dict[str, any]:
+        """ Lets the runner explore a fresh copy of the maze as maze_runner.py does and returns its steps, final path
+        length and score. The runner has to sense its way as in any other run, so the cached distances do not make
+        it any faster. With optimal, the length of the true shortest path is added for comparison, which costs a
+        search of the whole maze the first time a goal is asked for """
+        starting, goal = self._check(starting), self._check(goal)
+        maze = copy.deepcopy(self.maze)
+        maze.planner = self.planner
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, _, steps, path_length, score = maze.shortest_path(starting=starting, goal=goal)
+        result = {"steps": steps, "path_length": path_length, "score": score, "seconds": time.perf_counter() - start}
+        if optimal:
+            distance = int(self.distances(goal)[starting])
+            result["optimal_length"] = distance + 1 if distance >= 0 else None
+        return result
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "cached_goals": len(self._fields), "cached_bytes": self._field_bytes}
+
+
+def read_queries(query_file: str) -> list[tuple[list[int], list[int]]]:
+    """ Reads the starting and goal columns of a CSV file, or the keys of a JSONL file, as in a batch manifest """
+    with open(query_file, newline="") as file:
+        if query_file.endswith(".jsonl"):
+            entries = [json.loads(line) for line in file if line.strip()]
+        else:
+            entries = list(csv.DictReader(file, skipinitialspace=True))
+    return [(parse_coordinates(entry["starting"]), parse_coordinates(entry["goal"])) for entry in entries]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ECS Maze Runner Query Session")
+
+    parser.add_argument("maze", help='The name of the maze file, e.g., maze1.mz or maze1.mzb')
+    parser.add_argument("queries", help='A CSV file with the columns starting and goal (e.g., "0, 0","9, 9") or a '
+                                        '.jsonl file with one such object per line.')
+    parser.add_argument("--mode", help="'explore' lets the runner explore the maze for every query, 'shortest_path' "
+                                       "only looks up the shortest path on the true maze.",
+                        choices=["explore", "shortest_path"], default="explore")
+    parser.add_argument("--optimal", help="Adds the length of the true shortest path to each explore query, which "
+                                          "searches the whole maze once per goal.",
+                        action=argparse.BooleanOptionalAction, default=False)
+    parser.add_argument("--budget", help='The memory in MB the cached distances to the goals may take up.',
+                        type=float, default=BUDGET_MB)
+    parser.add_argument("--planner", help="How the flood values are updated after each step.",
+                        choices=PLANNERS, default="floodfill")
+    parser.add_argument("--cache", help=f"Loads text mazes from a binary copy in '{CACHE_DIR}' after the first run.",
+                        action=argparse.BooleanOptionalAction, default=True)
+
+    args = parser.parse_args()
+    config_handler.set_global(disable=True)
+
+    session = MazeSession(args.maze, args.planner, args.budget, CACHE_DIR if args.cache else None)
+    for starting, goal in read_queries(args.queries):
+        # Empty coordinates use the defaults of maze_runner.py
+        starting = starting or [0, 0]
+        goal = goal or [session.maze.width - 1, session.maze.height - 1]
+        start = time.perf_counter()
+        if args.mode == "explore":
+            result = session.explore(starting, goal, args.optimal)
+            print(f"{starting} -> {goal}: steps {result['steps']}, path length {result['path_length']}, score "
+                  f"{result['score']}", end="")
+            if args.optimal:
+                print(f", shortest possible {result['optimal_length']}", end="")
+        else:
+            path = session.shortest_path(starting, goal)
+            print(f"{starting} -> {goal}: path length {len(path) if path else None}", end="")
+        print(f", {(time.perf_counter() - start) * 1000:.1f} ms")
+    print("Distance cache:", ", ".join(f"{key} {value}" for key, value in session.stats().items()))
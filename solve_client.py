@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import json
+
+from maze import PLANNERS
+from solve_server import HOST, PORT
+
+# The longest reply line the client reads, the final path of a large maze comes in one line
+MAX_REPLY = 1 << 28
+
+
+class SolveClient:
+    """ One connection to a solve server, over which requests are sent one after another """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._next_id = 0
+
+    @classmethod
+    async def connect(cls, host: str = HOST, port: int = PORT, unix_socket: str | None = None):
+        if unix_socket is not None:
+            reader, writer = await asyncio.open_unix_connection(unix_socket, limit=MAX_REPLY)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=MAX_REPLY)
+        return cls(reader, writer)
+
+    async def request(self, message: dict[str, any]):
+        """ Sends a request and yields the server's messages for it, up to its last one """
+        self._next_id += 1
+        self.writer.write(json.dumps({**message, "id": self._next_id}).encode() + b"\n")
+        await self.writer.drain()
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionError("The solve server closed the connection.")
+            reply = json.loads(line)
+            yield reply
+            if reply["event"] not in ("steps", "path"):
+                return
+
+    async def solve(self, maze: str, starting=None, goal=None, planner: str = "floodfill", on_steps=None):
+        """ The result of a solve request with the final path added, the streamed steps go to on_steps. Raises
+        RuntimeError with the server's message if the request failed """
+        path = None
+        async for reply in self.request({"maze": maze, "starting": starting, "goal": goal, "planner": planner}):
+            if reply["event"] == "steps":
+                if on_steps is not None:
+                    on_steps(reply["steps"])
+            elif reply["event"] == "path":
+                path = reply["path"]
+            elif reply["event"] == "error":
+                raise RuntimeError(reply["error"])
+            else:
+                reply["path"] = path
+                return reply
+
+    async def command(self, command: str) -> dict[str, any]:
+        async for reply in self.request({"command": command}):
+            return reply
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def main(args):
+    client = await SolveClient.connect(args.host, args.port, args.unix_socket)
+    try:
+        if args.stats:
+            print(json.dumps(await client.command("stats")))
+            return
+        on_steps = (lambda steps: print("\n".join(",".join(map(str, step)) for step in steps))) if args.steps else None
+        result = await client.solve(args.maze, args.starting, args.goal, args.planner, on_steps)
+        print("Exploration steps:", result["steps"], "    Final path length:", result["path_length"],
+              "    score:", result["score"], f"    {result['seconds']:.3f} s")
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ECS Maze Runner Solve Client")
+
+    parser.add_argument("maze", help='The name of the maze file below the server\'s maze folder, e.g., maze1.mz',
+                        nargs="?")
+    parser.add_argument("--starting", help='The starting position, e.g., "0, 1"', default=None)
+    parser.add_argument("--goal", help='The goal position, e.g., "4, 4"', default=None)
+    parser.add_argument("--planner", help="How the flood values are updated after each step.",
+                        choices=PLANNERS, default="floodfill")
+    parser.add_argument("--steps", help='Prints the exploration steps as they arrive.', action="store_true")
+    parser.add_argument("--stats", help='Prints the statistics of the server instead of solving a maze.',
+                        action="store_true")
+    parser.add_argument("--host", help='The address of the server.', default=HOST)
+    parser.add_argument("--port", help='The port of the server.', type=int, default=PORT)
+    parser.add_argument("--unix_socket", help='Connects to this Unix socket instead of a port.', default=None)
+
+    args = parser.parse_args()
+
+    if args.maze is None and not args.stats:
+        parser.error("A maze file is needed unless --stats is given.")
+    try:
+        asyncio.run(main(args))
+    except RuntimeError as error:
+        parser.exit(1, f"{error}\n")
@@ -0,0 +1,186 @@
+import argparse
+import asyncio
+import contextlib
+import copy
+import functools
+import io
+import json
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import _describe, _init_worker, parse_coordinates
+from maze import PLANNERS
+from maze_binary import CACHE_DIR
+from maze_runner import load_maze
+
+HOST = "127.0.0.1"
+PORT = 8765
+# The number of parsed mazes each worker process keeps
+POOL_SIZE = 16
+# The number of exploration steps per streamed message
+STEPS_PER_MESSAGE = 1000
+# The longest request line the server reads, a request is a small JSON object
+MAX_REQUEST = 1 << 16
+
+
+def _load_maze(maze_file: str, mtime_ns: int, cache_dir: str | None):
+    """ The modification time is only part of the key, so a maze file that changed is parsed again """
+    return load_maze(maze_file, cache_dir)
+
+
+_pooled_maze = None
+
+
+def _init_pool_worker(pool_size: int):
+    """ Gives the worker process its own pool of parsed mazes, of which the least recently used one is dropped once
+    there are more than pool_size of them """
+    global _pooled_maze
+    _init_worker()
+    _pooled_maze = functools.lru_cache(maxsize=max(pool_size, 1))(_load_maze)
+
+
+def explore(maze_file: str, mtime_ns: int, cache_dir: str | None, starting, goal, planner: str) -> dict[str, any]:
+    """ Runs in a worker process on a copy of the maze from its pool, so only the maze's file name crosses over
+    instead of the whole parsed maze. The state of the worker's pool comes back with the result """
+    maze = copy.deepcopy(_pooled_maze(maze_file, mtime_ns, cache_dir))
+    starting = parse_coordinates(starting) or [0, 0]
+    goal = parse_coordinates(goal) or [maze.width - 1, maze.height - 1]
+    for x, y in (starting, goal):
+        if not (0 <= x < maze.width and 0 <= y < maze.height):
+            raise ValueError(f"({x}, {y}) lies outside of the {maze.width}x{maze.height} maze.")
+    maze.planner = planner
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        exploration_data, final_path, steps, path_length, score = maze.shortest_path(starting=starting, goal=goal)
+    info = _pooled_maze.cache_info()
+    return {"exploration": exploration_data[1:], "path": final_path, "steps": steps, "path_length": path_length,
+            "score": score, "seconds": time.perf_counter() - start,
+            "pool": (os.getpid(), info.hits, info.misses, info.currsize)}
+
+
+class SolveServer:
+    """ Answers JSON requests, one per line, on a connection. A solve request is an object with the keys maze,
+    starting, goal and optionally planner and id. The reply is a stream of JSON lines: the exploration steps in
+    messages of STEPS_PER_MESSAGE, then the final path and last the result with the score, each carrying the
+    request's id. {"command": "stats"} and {"command": "ping"} are answered straight away """
+
+    def __init__(self, root: str = ".", workers: int = 1, pool_size: int = POOL_SIZE,
+                 cache_dir: str | None = CACHE_DIR):
+        self.root = os.path.realpath(root)
+        self.cache_dir = cache_dir
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_pool_worker,
+                                            initargs=(pool_size,))
+        self.solved = 0
+        self.failed = 0
+        # The hits, misses and size of each worker's maze pool after its last request
+        self._pools = {}
+
+    def _maze_file(self, name: str) -> str:
+        """ The maze file below the server's root folder, which clients can not leave """
+        maze_file = os.path.realpath(os.path.join(self.root, name))
+        if os.path.commonpath([self.root, maze_file]) != self.root:
+            raise ValueError(f"{name} lies outside of the server's maze folder.")
+        return maze_file
+
+    async def _send(self, writer: asyncio.StreamWriter, message: dict[str, any]):
+        writer.write(json.dumps(message).encode() + b"\n")
+        # Waits while the client is slow to read, instead of piling up the stream in memory
+        await writer.drain()
+
+    def pool_stats(self) -> dict[str, int]:
+        """ The parsed mazes of all workers, each of which parses a maze the first time one of its requests needs it """
+        hits, misses, sizes = (sum(values) for values in zip(*self._pools.values())) if self._pools else (0, 0, 0)
+        return {"mazes": sizes, "hits": hits, "misses": misses, "evictions": misses - sizes}
+
+    async def solve(self, request: dict[str, any], writer: asyncio.StreamWriter):
+        request_id = request.get("id")
+        maze_file = self._maze_file(request["maze"])
+        planner = request.get("planner", "floodfill")
+        if planner not in PLANNERS:
+            raise ValueError(f"Unknown planner '{planner}'.")
+
+        result = await asyncio.get_running_loop().run_in_executor(
+            self.executor, explore, maze_file, os.stat(maze_file).st_mtime_ns, self.cache_dir, request.get("starting"),
+            request.get("goal"), planner)
+        worker, *pool = result.pop("pool")
+        self._pools[worker] = pool
+        exploration = result.pop("exploration")
+        for start in range(0, len(exploration), STEPS_PER_MESSAGE):
+            await self._send(writer, {"id": request_id, "event": "steps",
+                                      "steps": exploration[start:start + STEPS_PER_MESSAGE]})
+        await self._send(writer, {"id": request_id, "event": "path", "path": result.pop("path")})
+        await self._send(writer, {"id": request_id, "event": "result", **result})
+        self.solved += 1
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                request_id = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("A request has to be a JSON object.")
+                    request_id = request.get("id")
+                    command = request.get("command", "solve")
+                    if command == "ping":
+                        await self._send(writer, {"id": request_id, "event": "pong"})
+                    elif command == "stats":
+                        await self._send(writer, {"id": request_id, "event": "stats", "solved": self.solved,
+                                                  "failed": self.failed, "pool": self.pool_stats()})
+                    elif command == "solve":
+                        await self.solve(request, writer)
+                    else:
+                        raise ValueError(f"Unknown command '{command}'.")
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as error:
+                    self.failed += 1
+                    await self._send(writer, {"id": request_id, "event": "error", "error": _describe(error)})
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            # The client went away, sent a line longer than MAX_REQUEST or the server is stopping
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = HOST, port: int = PORT, unix_socket: str | None = None):
+        if unix_socket is not None:
+            server = await asyncio.start_unix_server(self.handle, unix_socket, limit=MAX_REQUEST)
+        else:
+            server = await asyncio.start_server(self.handle, host, port, limit=MAX_REQUEST)
+        # Being terminated stops the server the same way as Ctrl+C, so the worker processes are shut down with it
+        with contextlib.suppress(NotImplementedError):
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        address = unix_socket or f"{host}:{port}"
+        print(f"Solve server listening on {address}", flush=True)
+        try:
+            await server.serve_forever()
+        finally:
+            server.close()
+            self.executor.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ECS Maze Runner Solve Server")
+
+    parser.add_argument("--host", help='The address the server listens on.', default=HOST)
+    parser.add_argument("--port", help='The port the server listens on.', type=int, default=PORT)
+    parser.add_argument("--unix_socket", help='Listens on this Unix socket instead of a port.', default=None)
+    parser.add_argument("--root", help='The folder the maze names of the requests are taken from. Requests can not '
+                                       'reach files outside of it.', default=".")
+    parser.add_argument("--workers", help='The amount of processes the explorations run on.', type=int,
+                        default=os.cpu_count())
+    parser.add_argument("--pool_size", help='The amount of parsed mazes each worker process keeps in memory.', type=int,
+                        default=POOL_SIZE)
+    parser.add_argument("--cache", help=f"Loads text mazes from a binary copy in '{CACHE_DIR}' after the first run.",
+                        action=argparse.BooleanOptionalAction, default=True)
+
+    args = parser.parse_args()
+
+    server = SolveServer(args.root, args.workers, args.pool_size, CACHE_DIR if args.cache else None)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix_socket))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+from alive_progress import config_handler
+
+# The modules live at the top of the repository, which pytest does not put on the path by itself
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def quiet_progress_bars():
+    config_handler.set_global(disable=True)
@@ -0,0 +1,103 @@
+import os
+
+import pytest
+
+from checkpoint import CHECKPOINT_FILE
+from exploration_log import LOG_FILES, read_log
+from maze import PLANNERS, Maze
+from maze_gen import generate_walls, write_maze_file
+from tiled_walls import TiledWalls, read_tiled, write_tiled
+
+STARTING, GOAL = [0, 0], [19, 19]
+
+
+class Killed(Exception):
+    pass
+
+
+def make_maze(run_id: str, log_format: str | None, euclidian: bool, tiled_file: str | None = None) -> Maze:
+    if tiled_file is None:
+        maze = Maze(20, 20)
+        maze.add_walls(*generate_walls(20, 20, 4, 0.1, "backtracker"))
+    else:
+        maze = read_tiled(tiled_file)
+    maze.run_id = run_id
+    maze.log_format = log_format
+    maze.checkpoint_steps = 7
+    settings = list(maze.render_settings)
+    settings[4] = euclidian
+    maze.render_settings = tuple(settings)
+    return maze
+
+
+def kill_at(maze: Maze, step: int):
+    """ Stops the maze's next exploration as if the process died before the given step """
+    move = maze.move
+
+    def killed_move(runner, goal, num):
+        if num == step:
+            raise Killed
+        return move(runner, goal, num)
+
+    maze.move = killed_move
+    with pytest.raises(Killed):
+        maze.shortest_path(STARTING, GOAL)
+
+
+def finish(maze: Maze, starting, goal) -> tuple[list, list, float]:
+    """ The exploration rows, from the log if there is one, the final path and the score of the rest of the run """
+    exploration_data, final_path, _, _, score = maze.shortest_path(starting, goal)
+    if maze.log_format is not None:
+        exploration_data = read_log(os.path.join(maze.run_id, LOG_FILES[maze.log_format]))
+    return [[str(value) for value in row] for row in exploration_data], [tuple(cell) for cell in final_path], score
+
+
+@pytest.mark.parametrize("euclidian", [False, True])
+@pytest.mark.parametrize("log_format", [None, "csv", "rle"])
+@pytest.mark.parametrize("planner", PLANNERS)
+def test_resumed_run_matches_uninterrupted_run(tmp_path, planner, log_format, euclidian):
+    maze = make_maze(str(tmp_path / "full"), log_format, euclidian)
+    maze.planner = planner
+    expected = finish(maze, STARTING, GOAL)
+
+    run_id = str(tmp_path / "resumed")
+    maze = make_maze(run_id, log_format, euclidian)
+    maze.planner = planner
+    kill_at(maze, 35)
+
+    maze = make_maze(run_id, None, euclidian)
+    starting, goal = maze.resume(os.path.join(run_id, CHECKPOINT_FILE))
+    assert (maze.steps, maze.planner, maze.log_format) == (35, planner, log_format)
+    assert finish(maze, starting, goal) == expected
+    assert not os.path.exists(os.path.join(run_id, CHECKPOINT_FILE))
+
+
+def test_checkpoint_of_another_maze_is_refused(tmp_path):
+    run_id = str(tmp_path / "run")
+    kill_at(make_maze(run_id, None, False), 8)
+    with pytest.raises(ValueError):
+        Maze(10, 10).resume(os.path.join(run_id, CHECKPOINT_FILE))
+
+
+@pytest.mark.parametrize("planner", PLANNERS)
+def test_tiled_run_resumes_without_the_whole_grid(tmp_path, monkeypatch, planner):
+    maze = make_maze(str(tmp_path / "full"), None, False)
+    maze.planner = planner
+    expected = finish(maze, STARTING, GOAL)
+
+    maze_file, tiled_file = str(tmp_path / "maze.mz"), str(tmp_path / "maze.mzt")
+    write_maze_file(*generate_walls(20, 20, 4, 0.1, "backtracker"), maze_file)
+    write_tiled(maze_file, tiled_file, tile_size=8)
+
+    def to_array(self):
+        raise AssertionError("The checkpoint read the whole wall grid.")
+
+    monkeypatch.setattr(TiledWalls, "to_array", to_array)
+    run_id = str(tmp_path / "resumed")
+    maze = make_maze(run_id, None, False, tiled_file)
+    maze.planner = planner
+    kill_at(maze, 35)
+
+    maze = make_maze(run_id, None, False, tiled_file)
+    starting, goal = maze.resume(os.path.join(run_id, CHECKPOINT_FILE))
+    assert finish(maze, starting, goal) == expected
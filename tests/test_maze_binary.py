@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pytest
+
+import maze_runner
+from maze_binary import HEADER, MAGIC, VERSION, cache_path, read_binary, write_binary
+from maze_gen import generate_walls, write_maze_file
+
+
+def text_maze(tmp_path, width: int, height: int, seed: int = 0, loops: float = 0.) -> str:
+    maze_file = str(tmp_path / f"maze_{width}x{height}_{seed}.mz")
+    write_maze_file(*generate_walls(width, height, seed, loops), maze_file)
+    return maze_file
+
+
+@pytest.mark.parametrize("width, height, loops", [(1, 1, 0.), (1, 7, 0.), (7, 1, 0.), (5, 5, 0.), (13, 8, 0.1),
+                                                  (9, 16, 0.3)])
+def test_round_trip_matches_text_reader(tmp_path, width, height, loops):
+    maze = maze_runner.maze_reader(text_maze(tmp_path, width, height, width * height, loops))
+    binary_file = str(tmp_path / "maze.mzb")
+    write_binary(maze, binary_file)
+    loaded = read_binary(binary_file)
+    assert (loaded.width, loaded.height) == (width, height)
+    assert np.array_equal(loaded.wall_grid, maze.wall_grid)
+
+
+@pytest.fixture
+def binary_file(tmp_path) -> str:
+    binary_file = str(tmp_path / "maze.mzb")
+    write_binary(maze_runner.maze_reader(text_maze(tmp_path, 6, 4)), binary_file)
+    return binary_file
+
+
+def rewrite(binary_file: str, data: bytes):
+    with open(binary_file, "wb") as file:
+        file.write(data)
+
+
+def test_truncated_file(binary_file):
+    with open(binary_file, "rb") as file:
+        data = file.read()
+    rewrite(binary_file, data[:-1])
+    with pytest.raises(ValueError, match="does not hold the walls"):
+        read_binary(binary_file)
+    rewrite(binary_file, data[:HEADER.size - 1])
+    with pytest.raises(ValueError, match="too short"):
+        read_binary(binary_file)
+
+
+def test_bad_magic(binary_file):
+    with open(binary_file, "rb") as file:
+        data = file.read()
+    rewrite(binary_file, b"XXXX" + data[len(MAGIC):])
+    with pytest.raises(ValueError, match="not a binary maze file"):
+        read_binary(binary_file)
+
+
+def test_bad_version(binary_file):
+    with open(binary_file, "rb") as file:
+        data = file.read()
+    _, _, width, height = HEADER.unpack(data[:HEADER.size])
+    rewrite(binary_file, HEADER.pack(MAGIC, VERSION + 1, width, height) + data[HEADER.size:])
+    with pytest.raises(ValueError, match="version"):
+        read_binary(binary_file)
+
+
+def test_load_maze_uses_the_cache(tmp_path, monkeypatch):
+    maze_file = text_maze(tmp_path, 8, 6, 3)
+    cache_dir = str(tmp_path / ".maze_cache")
+    first = maze_runner.load_maze(maze_file, cache_dir)
+    assert os.path.exists(cache_path(maze_file, cache_dir))
+
+    def no_parsing(maze_file):
+        raise AssertionError("The text maze was parsed again.")
+
+    monkeypatch.setattr(maze_runner, "maze_reader", no_parsing)
+    second = maze_runner.load_maze(maze_file, cache_dir)
+    assert np.array_equal(second.wall_grid, first.wall_grid)
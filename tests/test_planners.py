@@ -0,0 +1,58 @@
+import pytest
+
+from maze import PLANNERS, Maze, SOUTH
+from maze_gen import generate_walls
+
+
+def make_maze(width: int, height: int, seed: int, loops: float, algorithm: str) -> Maze:
+    maze = Maze(width, height)
+    maze.add_walls(*generate_walls(width, height, seed, loops, algorithm))
+    return maze
+
+
+def assert_valid_run(maze: Maze, starting, goal, final_path):
+    assert tuple(final_path[0]) == tuple(starting) and tuple(final_path[-1]) == tuple(goal)
+    for cell, next_cell in zip(final_path, final_path[1:]):
+        assert tuple(next_cell) in maze.open_cells(*cell)
+
+
+@pytest.mark.parametrize("planner", PLANNERS)
+def test_start_with_a_wall_behind(planner):
+    """ The runner starts facing north and never senses the wall south of the start cell, which the shortest route
+    on the unknown maze leads through """
+    maze = make_maze(12, 12, 2, 0.2, "kruskal")
+    assert maze.wall_grid[2, 1] & SOUTH
+    maze.planner = planner
+    _, final_path, steps, path_length, score = maze.shortest_path([2, 1], [0, 0])
+    assert_valid_run(maze, (2, 1), (0, 0), final_path)
+    assert path_length == len(final_path)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_astar_reaches_the_goal(seed):
+    width, height = 4 + seed % 9, 3 + seed % 7
+    maze = make_maze(width, height, seed, (0, 0.1, 0.3)[seed % 3], ("backtracker", "kruskal")[seed % 2])
+    starting = [(seed * 7) % width, (seed * 3) % height]
+    goal = [(seed * 5 + 1) % width, (seed * 11 + 2) % height]
+    if starting == goal:
+        goal = [width - 1 - starting[0], height - 1 - starting[1]]
+    maze.planner = "astar"
+    _, final_path, *_ = maze.shortest_path(starting, goal)
+    assert_valid_run(maze, starting, goal, final_path)
+
+
+def test_incremental_flood_values_match_flood_fill():
+    """ The flood values the incremental planner works out when read equal a full flood fill, including which cells
+    have one at all """
+    maze = make_maze(15, 11, 3, 0.1, "kruskal")
+    for walled_in in (False, True):
+        if walled_in:
+            # The corner goal's last two open sides, after which no other cell can reach it
+            maze.add_wall(0, 0, 0)
+            maze.add_wall(0, 0, 1)
+        goal = (0, 0)
+        expected = maze.flood_fill(goal)
+        flood_values = maze.incremental_flood_fill(goal, maze.known_inner_walls())
+        assert flood_values
+        assert len(flood_values) == len(expected)
+        assert dict(flood_values.items()) == expected
@@ -0,0 +1,30 @@
+import os
+
+import cv2
+import numpy as np
+
+from maze import Maze
+from maze_gen import generate_walls
+from raster import RasterView
+from runner import create_runner
+
+
+def test_saved_images_match_the_painted_frames(tmp_path):
+    """ The images are compressed on background threads, closing the view waits for all of them """
+    maze = Maze(30, 20)
+    maze.add_walls(*generate_walls(30, 20, 5, 0.1))
+    maze.run_id = str(tmp_path / "run")
+    settings = list(maze.render_settings)
+    settings[0] = True
+    maze.render_settings = tuple(settings)
+    view, expected = RasterView(maze, 256), RasterView(maze, 256)
+    runner = create_runner(0, 0)
+    frames = []
+    for num in range(12):
+        view.update(runner, (29, 19), num)
+        frames.append(expected.frame(runner, (29, 19)))
+        runner = create_runner(min(num + 1, 29), 0)
+    view.close()
+    for num, frame in enumerate(frames):
+        image = cv2.imread(os.path.join(maze.run_id, f"{num}.png"))
+        assert np.array_equal(cv2.cvtColor(image, cv2.COLOR_BGR2RGB), frame)
@@ -0,0 +1,23 @@
+from maze_gen import generate_walls, write_maze_file
+from session import MazeSession
+
+
+def session(tmp_path) -> MazeSession:
+    maze_file = str(tmp_path / "maze.mz")
+    write_maze_file(*generate_walls(10, 10, 3, 0.1), maze_file)
+    return MazeSession(maze_file)
+
+
+def test_explore_skips_the_distance_search_unless_asked(tmp_path):
+    maze_session = session(tmp_path)
+    result = maze_session.explore((0, 0), (9, 9))
+    assert "optimal_length" not in result
+    assert maze_session.stats()["misses"] == 0
+
+
+def test_explore_with_optimal_matches_shortest_path(tmp_path):
+    maze_session = session(tmp_path)
+    result = maze_session.explore((0, 0), (9, 9), optimal=True)
+    assert result["optimal_length"] == len(maze_session.shortest_path((0, 0), (9, 9)))
+    assert result["optimal_length"] <= result["path_length"]
+    assert maze_session.stats()["hits"] == 1
@@ -0,0 +1,51 @@
+import asyncio
+import os
+
+import pytest
+
+from maze_gen import generate_walls, write_walls
+from solve_client import SolveClient
+from solve_server import SolveServer
+
+
+async def solve_all(root: str, socket_file: str, requests: list[tuple[str, dict]]) -> tuple[list, dict]:
+    """ The results, or the error messages, of the requests in order and the server's statistics afterwards. Each
+    request is a maze file to write before it, if any, and the request itself """
+    server = SolveServer(root, workers=1, cache_dir=None)
+    serving = asyncio.create_task(server.serve(unix_socket=socket_file))
+    while not os.path.exists(socket_file):
+        await asyncio.sleep(0.01)
+    client = await SolveClient.connect(unix_socket=socket_file)
+    results = []
+    try:
+        for maze_file, request in requests:
+            if maze_file is not None:
+                write_walls(*generate_walls(*request.pop("size"), 1), os.path.join(root, maze_file))
+            try:
+                results.append(await client.solve(**request))
+            except RuntimeError as error:
+                results.append(str(error))
+        stats = await client.command("stats")
+    finally:
+        await client.close()
+        serving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await serving
+    return results, stats
+
+
+def test_workers_keep_their_mazes_until_the_file_changes(tmp_path):
+    results, stats = asyncio.run(solve_all(str(tmp_path), str(tmp_path / "server.sock"), [
+        ("maze.mzb", {"maze": "maze.mzb", "size": (12, 9)}),
+        (None, {"maze": "maze.mzb", "goal": "3, 4"}),
+        (None, {"maze": "maze.mzb", "goal": "12, 0"}),
+        ("maze.mzb", {"maze": "maze.mzb", "size": (20, 6)}),
+        (None, {"maze": "../maze.mzb"}),
+    ]))
+    assert results[0]["path"][-1] == [11, 8]
+    assert results[1]["path"][-1] == [3, 4]
+    assert results[2] == "ValueError: (12, 0) lies outside of the 12x9 maze."
+    assert results[3]["path"][-1] == [19, 5]
+    assert results[4].startswith("ValueError")
+    assert (stats["solved"], stats["failed"]) == (3, 2)
+    assert stats["pool"] == {"mazes": 2, "hits": 2, "misses": 2, "evictions": 0}
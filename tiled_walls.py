@@ -0,0 +1,248 @@
+import argparse
+import os
+import struct
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+from maze import EAST, NORTH, SOUTH, WEST, Maze
+
+# Magic bytes, format version, width, height and tile size, followed by the tiles in (tile x, tile y) order. Each
+# tile holds the N, E, S, W wall bits of tile size x tile size cells, one byte per cell, indexed [x, y] within it
+MAGIC = b"MZT\0"
+VERSION = 1
+HEADER = struct.Struct("<4sHIII")
+TILE_SIZE = 256
+# The number of tiles held in memory, 64 MiB with the default tile size
+MAX_TILES = 1024
+
+
+class TiledWalls:
+    """ The wall bits of a maze in a file on disk, split into square tiles of which only the most recently used ones
+    are held in memory. Indexing it with [x, y] reads and writes single cells like the NumPy grid of a Maze """
+
+    def __init__(self, file, max_tiles: int = MAX_TILES):
+        self._file = file
+        self._file.seek(0)
+        header = self._file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{file.name} is too short to be a tiled maze file.")
+        magic, version, width, height, tile_size = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{file.name} is not a tiled maze file.")
+        if version != VERSION:
+            raise ValueError(f"{file.name} uses version {version} of the tiled maze format, expected {VERSION}.")
+        if tile_size & (tile_size - 1):
+            raise ValueError(f"{file.name} has a tile size of {tile_size}, which is not a power of two.")
+
+        self.width = width
+        self.height = height
+        self.shape = (width, height)
+        self.tile_size = tile_size
+        self._shift = tile_size.bit_length() - 1
+        self._mask = tile_size - 1
+        self._tiles_x = -(-width // tile_size)
+        self._tiles_y = -(-height // tile_size)
+        self._max_tiles = max(max_tiles, 1)
+        self._tiles = OrderedDict()
+        self._dirty = set()
+        # The tiles written since the file was created, None for a file that was opened and may hold walls anywhere
+        self._written = None
+        self._last_key = None
+        self._last_view = None
+        self._temporary = False
+
+    @classmethod
+    def open(cls, tiled_file: str, writable: bool = False, max_tiles: int = MAX_TILES) -> "TiledWalls":
+        return cls(open(tiled_file, "r+b" if writable else "rb"), max_tiles)
+
+    @classmethod
+    def create(cls, tiled_file: str | None, width: int, height: int, tile_size: int = TILE_SIZE,
+               max_tiles: int = MAX_TILES) -> "TiledWalls":
+        """ Creates a maze file with only the outer walls. Without a file name, it is a temporary file that is deleted
+        once it is closed. The tiles are not written until they are used, so creating even a huge maze is instant """
+        file = open(tiled_file, "w+b") if tiled_file is not None else tempfile.TemporaryFile(suffix=".mzt")
+        file.write(HEADER.pack(MAGIC, VERSION, width, height, tile_size))
+        file.truncate(HEADER.size + -(-width // tile_size) * -(-height // tile_size) * tile_size * tile_size)
+        walls = cls(file, max_tiles)
+        walls._temporary = tiled_file is None
+        walls._written = set()
+        if width > 0 and height > 0:
+            walls.or_block(0, 0, np.full((1, height), WEST, dtype=np.uint8))
+            walls.or_block(width - 1, 0, np.full((1, height), EAST, dtype=np.uint8))
+            walls.or_block(0, 0, np.full((width, 1), SOUTH, dtype=np.uint8))
+            walls.or_block(0, height - 1, np.full((width, 1), NORTH, dtype=np.uint8))
+        return walls
+
+    def blank(self) -> "TiledWalls":
+        """ A temporary maze of the same size and tiling with only the outer walls """
+        return TiledWalls.create(None, self.width, self.height, self.tile_size, self._max_tiles)
+
+    def _load(self, key: tuple[int, int]):
+        tile = self._tiles.get(key)
+        if tile is None:
+            tile_x, tile_y = key
+            if not (0 <= tile_x < self._tiles_x and 0 <= tile_y < self._tiles_y):
+                raise IndexError(f"Tile {key} lies outside of the {self.width}x{self.height} maze.")
+            array = np.empty((self.tile_size, self.tile_size), dtype=np.uint8)
+            self._file.seek(HEADER.size + (tile_x * self._tiles_y + tile_y) * array.size)
+            self._file.readinto(array)
+            tile = self._tiles[key] = (array, memoryview(array))
+            if len(self._tiles) > self._max_tiles:
+                self._evict()
+        else:
+            self._tiles.move_to_end(key)
+        self._last_key = key
+        self._last_view = tile[1]
+        return tile[0]
+
+    def _evict(self):
+        key, (array, _) = self._tiles.popitem(last=False)
+        if key in self._dirty:
+            self._write_tile(key, array)
+
+    def _write_tile(self, key: tuple[int, int], array: np.ndarray):
+        self._file.seek(HEADER.size + (key[0] * self._tiles_y + key[1]) * array.size)
+        self._file.write(array.tobytes())
+        self._dirty.discard(key)
+        if self._written is not None:
+            self._written.add(key)
+
+    def __getitem__(self, cell: tuple[int, int]) -> int:
+        x, y = cell
+        key = (x >> self._shift, y >> self._shift)
+        if key != self._last_key:
+            self._load(key)
+        return self._last_view[x & self._mask, y & self._mask]
+
+    def __setitem__(self, cell: tuple[int, int], value: int):
+        x, y = cell
+        key = (x >> self._shift, y >> self._shift)
+        if key != self._last_key:
+            self._load(key)
+        self._last_view[x & self._mask, y & self._mask] = value
+        self._dirty.add(key)
+
+    def item(self, x: int, y: int) -> int:
+        return self[x, y]
+
+    def blocks(self, walled_only: bool = False):
+        """ Yields the lower left cell and the wall bits of every tile, cut to the maze. With walled_only, the tiles of
+        a created maze that were never written are left out, as they hold no walls at all """
+        if walled_only and self._written is not None:
+            keys = sorted(self._written | self._dirty)
+        else:
+            keys = ((tile_x, tile_y) for tile_x in range(self._tiles_x) for tile_y in range(self._tiles_y))
+        for tile_x, tile_y in keys:
+            x0, y0 = tile_x * self.tile_size, tile_y * self.tile_size
+            array = self._load((tile_x, tile_y))
+            yield x0, y0, array[:self.width - x0, :self.height - y0]
+
+    def or_block(self, x0: int, y0: int, bits: np.ndarray):
+        """ Adds the wall bits of the (columns, rows) block whose lower left cell is (x0, y0) """
+        x1, y1 = x0 + bits.shape[0], y0 + bits.shape[1]
+        for tile_x in range(x0 >> self._shift, ((x1 - 1) >> self._shift) + 1):
+            for tile_y in range(y0 >> self._shift, ((y1 - 1) >> self._shift) + 1):
+                array = self._load((tile_x, tile_y))
+                tx0, ty0 = tile_x * self.tile_size, tile_y * self.tile_size
+                ax0, ay0 = max(x0, tx0), max(y0, ty0)
+                ax1, ay1 = min(x1, tx0 + self.tile_size), min(y1, ty0 + self.tile_size)
+                array[ax0 - tx0:ax1 - tx0, ay0 - ty0:ay1 - ty0] |= bits[ax0 - x0:ax1 - x0, ay0 - y0:ay1 - y0]
+                self._dirty.add((tile_x, tile_y))
+
+    def region(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """ The wall bits of the cells from (x0, y0) up to, but not including, (x1, y1), read from the tiles they lie in """
+        region = np.empty((x1 - x0, y1 - y0), dtype=np.uint8)
+        for tile_x in range(x0 >> self._shift, ((x1 - 1) >> self._shift) + 1):
+            for tile_y in range(y0 >> self._shift, ((y1 - 1) >> self._shift) + 1):
+                array = self._load((tile_x, tile_y))
+                tx0, ty0 = tile_x * self.tile_size, tile_y * self.tile_size
+                ax0, ay0 = max(x0, tx0), max(y0, ty0)
+                ax1, ay1 = min(x1, tx0 + self.tile_size), min(y1, ty0 + self.tile_size)
+                region[ax0 - x0:ax1 - x0, ay0 - y0:ay1 - y0] = array[ax0 - tx0:ax1 - tx0, ay0 - ty0:ay1 - ty0]
+        return region
+
+    def add_walls(self, horizontal: np.ndarray, vertical: np.ndarray, x0: int = 0):
+        """ Adds inner walls in the layout Maze.add_walls takes them, a band of columns at a time. horizontal holds
+        the columns from x0 on and vertical the vertical lines to the right of them, so a maze can be filled in bands
+        that never need to be in memory together """
+        for start in range(0, horizontal.shape[0], self.tile_size):
+            h_band = np.asarray(horizontal[start:start + self.tile_size]).astype(np.uint8)
+            v_band = np.asarray(vertical[start:start + self.tile_size]).astype(np.uint8)
+            bits = np.zeros((h_band.shape[0], self.height), dtype=np.uint8)
+            bits[:, 1:] |= h_band * np.uint8(SOUTH)
+            bits[:, :-1] |= h_band * np.uint8(NORTH)
+            bits[:v_band.shape[0]] |= v_band * np.uint8(EAST)
+            self.or_block(x0 + start, 0, bits)
+            if v_band.size:
+                self.or_block(x0 + start + 1, 0, v_band * np.uint8(WEST))
+
+    def to_array(self) -> np.ndarray:
+        """ The whole wall grid in memory, for the few uses that need all of it at once, like rendering """
+        grid = np.empty(self.shape, dtype=np.uint8)
+        for x0, y0, bits in self.blocks():
+            grid[x0:x0 + bits.shape[0], y0:y0 + bits.shape[1]] = bits
+        return grid
+
+    def flush(self):
+        for key in list(self._dirty):
+            self._write_tile(key, self._tiles[key][0])
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            if self._file.writable():
+                self.flush()
+            self._file.close()
+
+    def __getstate__(self):
+        """ Copies of a maze open the same file, as the walls of the maze itself do not change during a run """
+        if self._temporary:
+            raise TypeError("The walls of a temporary tiled maze can not be copied.")
+        if self._file.writable():
+            self.flush()
+        return {"path": self._file.name, "writable": self._file.writable(), "max_tiles": self._max_tiles}
+
+    def __setstate__(self, state):
+        self.__init__(open(state["path"], "r+b" if state["writable"] else "rb"), state["max_tiles"])
+
+
+def read_tiled(tiled_file: str, max_tiles: int = MAX_TILES) -> Maze:
+    walls = TiledWalls.open(tiled_file, max_tiles=max_tiles)
+    return Maze(walls.width, walls.height, walls=walls)
+
+
+def write_tiled(maze_file: str, tiled_file: str, tile_size: int = TILE_SIZE):
+    """ Converts a text or binary maze file. Binary mazes are converted a band of columns at a time, so they never need
+    to fit into memory """
+    from maze_binary import binary_bands
+    from maze_runner import maze_reader
+
+    if maze_file.endswith(".mzb"):
+        width, height, bands = binary_bands(maze_file, tile_size)
+        walls = TiledWalls.create(tiled_file, width, height, tile_size)
+        for x0, horizontal, vertical in bands:
+            walls.add_walls(horizontal, vertical, x0)
+    else:
+        maze = maze_reader(maze_file)
+        walls = TiledWalls.create(tiled_file, maze.width, maze.height, tile_size)
+        horizontal, vertical = maze.inner_walls()
+        walls.add_walls(horizontal, vertical)
+    walls.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ECS Maze Runner Tiled Maze Converter")
+
+    parser.add_argument("maze", help='The name of the text or binary maze file, e.g., maze1.mz or maze1.mzb')
+    parser.add_argument("output", help='The name of the tiled maze file, defaults to the maze name with .mzt',
+                        nargs="?", default=None)
+    parser.add_argument("--tile_size", help='The side length of the tiles, a power of two.', type=int,
+                        default=TILE_SIZE)
+
+    args = parser.parse_args()
+
+    output = args.output if args.output is not None else os.path.splitext(args.maze)[0] + ".mzt"
+    write_tiled(args.maze, output, args.tile_size)
+    print(f"Tiled maze saved as {output}")
@@ -1,13 +1,35 @@
 import argparse
+import itertools
 
 import cv2
 import os
 
-def make_video(image_folder: str, output_video: str, frame_rate: float = 5):
+# The frames Maze.shortest_path renders after the exploration steps
+FINAL_FRAMES = (100000, 100001, 100002)
 
-    image_files = sorted([img for img in os.listdir(image_folder) if img.endswith(".png")], key=lambda x: int(os.path.splitext(x)[0]))
 
-    first_image_path = os.path.join(image_folder, image_files[0])
+def stream_image_files(image_folder: str):
+    """ Yields the step images in order by probing for the next step number, so the folder is never listed """
+    num = 0
+    while os.path.exists(os.path.join(image_folder, f"{num}.png")):
+        yield f"{num}.png"
+        num += 1
+    for num in FINAL_FRAMES:
+        if os.path.exists(os.path.join(image_folder, f"{num}.png")):
+            yield f"{num}.png"
+
+
+def make_video(image_folder: str, output_video: str, frame_rate: float = 5, stream: bool = False):
+
+    if stream:
+        image_files = stream_image_files(image_folder)
+        first_image = next(image_files)
+        image_files = itertools.chain([first_image], image_files)
+    else:
+        image_files = sorted([img for img in os.listdir(image_folder) if img.endswith(".png")], key=lambda x: int(os.path.splitext(x)[0]))
+        first_image = image_files[0]
+
+    first_image_path = os.path.join(image_folder, first_image)
     print(first_image_path)
     frame = cv2.imread(first_image_path)
     height, width, layers = frame.shape
@@ -29,9 +51,12 @@ if __name__ == "__main__":
     parser.add_argument("image_directory", help='The absolute path to the directory containing the images.')
     parser.add_argument("output_name", help='The the file name of the generated video.')
     parser.add_argument("--frame_rate", help='The amount of time the image is displayed.', default=1.)
+    parser.add_argument("--stream", help='Reads the images one step number after another instead of listing and '
+                                         'sorting the whole folder first.', action=argparse.BooleanOptionalAction,
+                        default=False)
 
     args = parser.parse_args()
 
     print(args.image_directory, args.output_name, args.frame_rate)
 
-    make_video(args.image_directory, args.output_name, float(args.frame_rate))
\ No newline at end of file
+    make_video(args.image_directory, args.output_name, float(args.frame_rate), args.stream)
\ No newline at end of file